@@ -0,0 +1,221 @@
+"""
+Batch degrees-of-separation queries.
+
+Reads (source, target) pairs, groups them by source so a single BFS
+tree answers every target of that source, and streams one JSON object
+per pair. Groups are spread across a process pool; workers share the
+graph through fork or, failing that, through the memory-mapped snapshot.
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import sys
+
+from components import Components, load_components
+from graph import load_graph
+from name_index import NameIndex
+
+# Graph used by pool workers, set before the pool starts or loaded by
+# each worker on startup
+worker_graph = None
+
+
+def read_pairs(f):
+    """
+    Yields (source, target) pairs from CSV rows, skipping blank rows
+    and an optional `source,target` header.
+    """
+    for i, row in enumerate(csv.reader(f)):
+        row = [value.strip() for value in row]
+        if not any(row):
+            continue
+        if i == 0 and [value.lower() for value in row] == ["source", "target"]:
+            continue
+        if len(row) != 2:
+            raise ValueError(f"line {i + 1}: expected source,target")
+        yield row[0], row[1]
+
+
+def resolve(graph, value):
+    """
+    Returns the person_id for an IMDB id or an unambiguous name,
+    or None if there is no such person or the name is ambiguous.
+    """
+    if value in graph.person_index:
+        return value
+    person_ids = graph.person_ids_for_name(value)
+    if len(person_ids) == 1:
+        return person_ids[0]
+    return None
+
+
+def group_pairs(graph, pairs):
+    """
+    Groups pairs by resolved source.
+
+    Returns a dict mapping source person_ids to a list of (source value,
+    target value, target person_id) and a list of results for pairs
+    that could not be resolved.
+    """
+    groups = {}
+    errors = []
+    for source_value, target_value in pairs:
+        source = resolve(graph, source_value)
+        target = resolve(graph, target_value)
+        if source is None or target is None:
+            missing = source_value if source is None else target_value
+            errors.append({
+                "source": source_value,
+                "target": target_value,
+                "error": f"unknown or ambiguous person: {missing}",
+                "missing": missing,
+            })
+            continue
+        groups.setdefault(source, []).append(
+            (source_value, target_value, target)
+        )
+    return groups, errors
+
+
+def split_disconnected(components, groups):
+    """
+    Removes the queries whose target is in another component than their
+    source from `groups`, dropping groups left empty.
+
+    Returns the results of the removed queries, answered without search.
+    """
+    results = []
+    for source in list(groups):
+        connected = []
+        for source_value, target_value, target in groups[source]:
+            if components.connected(source, target):
+                connected.append((source_value, target_value, target))
+            else:
+                results.append({
+                    "source": source_value,
+                    "target": target_value,
+                    "degrees": None,
+                    "path": None,
+                })
+        if connected:
+            groups[source] = connected
+        else:
+            del groups[source]
+    return results
+
+
+def add_suggestions(graph, errors):
+    """
+    Replaces the missing value of each unresolved pair with suggestions
+    for it, if it is not a known name.
+    """
+    name_index = NameIndex(graph.person_names)
+    for error in errors:
+        missing = error.pop("missing")
+        if not graph.person_ids_for_name(missing):
+            error["suggestions"] = name_index.suggest(missing)
+
+
+def answer_group(graph, source, queries):
+    """
+    Answers every query of one source from a single BFS tree.
+    """
+    s = graph.person_index[source]
+
+    # A lone target can stop the search as soon as it is reached
+    targets = {graph.person_index[target] for _, _, target in queries}
+    t = next(iter(targets)) if len(targets) == 1 else None
+    parent_person, parent_movie = graph.bfs(s, t)
+
+    results = []
+    for source_value, target_value, target in queries:
+        t = graph.person_index[target]
+        if parent_person[t] == -1:
+            path = None
+        else:
+            path = graph.path_to(t, parent_person, parent_movie)
+        results.append({
+            "source": source_value,
+            "target": target_value,
+            "degrees": None if path is None else len(path),
+            "path": path,
+        })
+    return results
+
+
+def init_worker(directory, cache):
+    """
+    Loads the graph in a pool worker unless it was inherited by fork.
+    """
+    global worker_graph
+    if worker_graph is None:
+        worker_graph = load_graph(directory, cache=cache)
+
+
+def answer_group_in_worker(group):
+    return answer_group(worker_graph, *group)
+
+
+def run_batch(graph, pairs, output, workers=None, directory=None, cache=True):
+    """
+    Answers every (source, target) pair against `graph`, writing one
+    JSON line per pair to `output` as soon as its group is done.
+
+    Pairs in different components are answered without searching.
+    Uses `workers` processes, all of them by default; workers that do
+    not inherit `graph` by fork reload it from `directory`.
+    """
+    global worker_graph
+
+    groups, errors = group_pairs(graph, pairs)
+    if errors:
+        add_suggestions(graph, errors)
+    for result in errors:
+        write_result(output, result)
+
+    if directory is not None:
+        components = load_components(graph, directory)
+    else:
+        components = Components.build(graph)
+    for result in split_disconnected(components, groups):
+        write_result(output, result)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(groups) <= 1:
+        for source, queries in groups.items():
+            for result in answer_group(graph, source, queries):
+                write_result(output, result)
+        return
+
+    worker_graph = graph
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "fork" if "fork" in methods else None
+    )
+    with context.Pool(workers, initializer=init_worker,
+                      initargs=(directory, cache)) as pool:
+        for results in pool.imap_unordered(answer_group_in_worker,
+                                           groups.items()):
+            for result in results:
+                write_result(output, result)
+
+
+def write_result(output, result):
+    output.write(json.dumps(result) + "\n")
+    output.flush()
+
+
+def main(directory, filename, workers=None, cache=True):
+    """
+    Runs a batch from `filename`, or from stdin if it is "-",
+    writing results to stdout.
+    """
+    graph = load_graph(directory, cache=cache)
+    if filename == "-":
+        pairs = list(read_pairs(sys.stdin))
+    else:
+        with open(filename, encoding="utf-8", newline="") as f:
+            pairs = list(read_pairs(f))
+    run_batch(graph, pairs, sys.stdout, workers, directory, cache)
@@ -0,0 +1,75 @@
+"""
+Times shortest_path on the same random queries with the original
+list-backed frontier and with the indexed deque-backed frontier.
+
+Usage: python benchmark.py [directory] [queries]
+"""
+
+import random
+import sys
+import time
+
+import degrees
+from util import QueueFrontier, IndexedQueueFrontier
+
+# Seed for picking query pairs, so runs are comparable
+SEED = 0
+
+FRONTIERS = [
+    ("QueueFrontier", QueueFrontier),
+    ("IndexedQueueFrontier", IndexedQueueFrontier),
+]
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print("Loading data...")
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    print(f"Data loaded in {time.perf_counter() - start:.2f}s.")
+
+    pairs = sample_pairs(queries)
+
+    results = {}
+    for name, frontier_class in FRONTIERS:
+        elapsed, paths = time_queries(pairs, frontier_class)
+        results[name] = paths
+        print(f"{name}: {elapsed:.3f}s total, "
+              f"{elapsed / len(pairs) * 1000:.1f}ms per query")
+
+    # Both frontiers must find paths of the same length
+    lengths = [
+        [None if path is None else len(path) for path in paths]
+        for paths in results.values()
+    ]
+    if any(other != lengths[0] for other in lengths[1:]):
+        sys.exit("Frontiers disagree on path lengths.")
+
+
+def sample_pairs(count):
+    """
+    Returns `count` random (source, target) person_id pairs.
+    """
+    rng = random.Random(SEED)
+    person_ids = sorted(degrees.people)
+    return [tuple(rng.sample(person_ids, 2)) for _ in range(count)]
+
+
+def time_queries(pairs, frontier_class):
+    """
+    Runs every query with `frontier_class` and returns the total
+    elapsed time along with the paths found.
+    """
+    paths = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        paths.append(degrees.shortest_path(source, target, frontier_class))
+    return time.perf_counter() - start, paths
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Connected-component labeling and eccentricity analytics for the
+degrees graph.
+
+Components are found once with union-find and saved next to the CSV
+files, so whether two people are connected at all is an O(1) lookup.
+
+Usage: python components.py [directory]
+"""
+
+import functools
+import os
+import sys
+import time
+from array import array
+
+from graph import INDEX_TYPE, load_graph, read_file, snapshot_key, write_file
+
+COMPONENTS_FILE = "components.index"
+COMPONENTS_MAGIC = b"DEGCOMP\0"
+COMPONENTS_VERSION = 2
+
+# Number of largest components listed in the report
+REPORT_COMPONENTS = 10
+
+
+class Components():
+
+    def __init__(self, graph, labels, sizes):
+        """
+        `labels[p]` is the component of person index `p`; components
+        are numbered from largest to smallest, with sizes in `sizes`.
+        """
+        self.graph = graph
+        self.labels = labels
+        self.sizes = sizes
+
+    @classmethod
+    def build(cls, graph):
+        """
+        Labels components by union-find over the stars of each movie.
+        """
+        parent = array(INDEX_TYPE, range(graph.num_people))
+
+        def find(p):
+            while parent[p] != p:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            return p
+
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+        for m in range(graph.num_movies):
+            start, end = movie_offsets[m], movie_offsets[m + 1]
+            if end - start < 2:
+                continue
+            root = find(movie_people[start])
+            for j in range(start + 1, end):
+                other = find(movie_people[j])
+                if other != root:
+                    parent[other] = root
+
+        # Renumber roots densely, largest component first
+        roots = [find(p) for p in range(graph.num_people)]
+        counts = {}
+        for root in roots:
+            counts[root] = counts.get(root, 0) + 1
+        order = sorted(counts, key=lambda root: (-counts[root], root))
+        number = {root: i for i, root in enumerate(order)}
+
+        labels = array(INDEX_TYPE, (number[root] for root in roots))
+        sizes = array(INDEX_TYPE, (counts[root] for root in order))
+        return cls(graph, labels, sizes)
+
+    def connected(self, source, target):
+        """
+        Returns True if the source and the target are in the same component.
+        """
+        index = self.graph.person_index
+        return self.labels[index[source]] == self.labels[index[target]]
+
+    def guard(self, search):
+        """
+        Wraps a `search(source, target)` function so that people in
+        different components return None without searching.
+        """
+        @functools.wraps(search)
+        def guarded(source, target):
+            if not self.connected(source, target):
+                return None
+            return search(source, target)
+        return guarded
+
+    def eccentricity_bounds(self, component, sweeps=4):
+        """
+        Estimates the diameter of a component with repeated double sweeps.
+
+        Each sweep runs a BFS from the farthest person found so far; the
+        largest eccentricity seen is a lower bound on the diameter and
+        twice the smallest is an upper bound.
+
+        Returns (lower, upper).
+        """
+        graph = self.graph
+        p = next(p for p, label in enumerate(self.labels) if label == component)
+        lower, upper = 0, None
+        for _ in range(sweeps):
+            distance = graph.distances(p)
+            farthest = max(range(graph.num_people), key=distance.__getitem__)
+            eccentricity = distance[farthest]
+            lower = max(lower, eccentricity)
+            if upper is None or 2 * eccentricity < upper:
+                upper = 2 * eccentricity
+            if farthest == p:
+                break
+            p = farthest
+        return lower, upper
+
+    def save(self, path, key):
+        """
+        Writes the labels to `path`, tagged with the dataset key they
+        were built from.
+        """
+        header = {
+            "num_people": self.graph.num_people,
+            "itemsize": array(INDEX_TYPE).itemsize,
+        }
+        blobs = [self.labels.tobytes(), self.sizes.tobytes()]
+        write_file(path, COMPONENTS_MAGIC, COMPONENTS_VERSION, key,
+                   header, blobs)
+
+    @classmethod
+    def load(cls, graph, path, key):
+        """
+        Returns the components stored at `path`, or None if they are
+        missing, unreadable, from another version or built from
+        different data.
+        """
+        stored = read_file(path, COMPONENTS_MAGIC, COMPONENTS_VERSION, key)
+        if stored is None:
+            return None
+        header, sections = stored
+        if (header.get("num_people") != graph.num_people
+                or header.get("itemsize") != array(INDEX_TYPE).itemsize
+                or len(sections) != 2):
+            return None
+
+        labels, sizes = (section.cast(INDEX_TYPE) for section in sections)
+        if len(labels) != graph.num_people:
+            return None
+        return cls(graph, labels, sizes)
+
+
+def load_components(graph, directory):
+    """
+    Loads the component labels kept next to the CSV files, building
+    and saving them first if they are missing or stale.
+    """
+    path = os.path.join(directory, COMPONENTS_FILE)
+    key = snapshot_key(directory)
+    components = Components.load(graph, path, key)
+    if components is None:
+        components = Components.build(graph)
+        try:
+            components.save(path, key)
+        except OSError:
+            pass
+    return components
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python components.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    print("Loading data...")
+    graph = load_graph(directory)
+    print("Data loaded.")
+
+    start = time.perf_counter()
+    components = Components.build(graph)
+    components.save(os.path.join(directory, COMPONENTS_FILE),
+                    snapshot_key(directory))
+    elapsed = time.perf_counter() - start
+
+    sizes = components.sizes
+    isolated = sum(1 for size in sizes if size == 1)
+    print(f"Labeled {len(sizes)} components in {elapsed:.2f}s.")
+    print(f"{isolated} people share no movie with anyone else.")
+    for i, size in enumerate(sizes[:REPORT_COMPONENTS]):
+        share = size / graph.num_people * 100
+        print(f"  Component {i}: {size} people ({share:.1f}%)")
+
+    if sizes and sizes[0] > 1:
+        lower, upper = components.eccentricity_bounds(0)
+        print(f"Largest component diameter: between {lower} and {upper}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
+import argparse
 import csv
+import itertools
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import batch
+import server
+from components import load_components
+from graph import load_graph
+from landmarks import load_index
+from name_index import NameIndex
+from util import Node, IndexedQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,6 +20,9 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Fuzzy index over every name, built the first time a name is not found
+name_index = None
+
 
 def load_data(directory):
     """
@@ -52,46 +63,138 @@ def load_data(directory):
                 pass
 
 
+# Search engines selectable from the command line
+ENGINES = {}
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [directory] [--engine ENGINE] "
+              "[--paths K | --bounds] "
+              "[--batch FILE [--workers N] | --serve ADDRESS]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--engine",
+                        choices=sorted(ENGINES) + ["alt", "csr"],
+                        default="csr",
+                        help="search engine; bfs and bidirectional also "
+                             "load the CSV files into dicts (default: csr)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't read or write the graph snapshot")
+    parser.add_argument("--paths", type=int, metavar="K",
+                        help="print up to K shortest paths (0 for all); "
+                             "uses the csr engine")
+    parser.add_argument("--bounds", action="store_true",
+                        help="print landmark bounds on the degrees of "
+                             "separation instead of searching")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer source,target pairs from a CSV file "
+                             "(- for stdin) as JSON lines")
+    parser.add_argument("--workers", type=int,
+                        help="processes for batch mode (default: all cores)")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="serve queries over HTTP on HOST:PORT "
+                             "or a Unix socket path")
+    args = parser.parse_args()
+
+    if args.serve:
+        server.main(args.directory, args.serve, cache=not args.no_cache)
+        return
+
+    if args.batch:
+        batch.main(args.directory, args.batch, args.workers,
+                   cache=not args.no_cache)
+        return
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    graph = load_graph(args.directory, cache=not args.no_cache)
+    index = None
+    if args.engine == "alt" or args.bounds:
+        index = load_index(graph, args.directory)
+    if args.engine == "alt":
+        search = index.shortest_path
+    elif args.engine == "csr" or args.paths is not None or args.bounds:
+        search = graph.shortest_path
+    else:
+        load_data(args.directory)
+        search = ENGINES[args.engine]
+
+    # Every engine answers people in different components without searching
+    components = load_components(graph, args.directory)
+    search = components.guard(search)
     print("Data loaded.")
-    
-    source = person_id_for_name(input("Name: "))
-   
+
+    source = person_id_for_name(input("Name: "), graph)
+
     if source is None:
         sys.exit("Person not found.")
 
-    target = person_id_for_name(input("Name: "))
-    
+    target = person_id_for_name(input("Name: "), graph)
+
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.bounds:
+        lower, upper = index.bounds(source, target)
+        if lower is None or not components.connected(source, target):
+            print("Not connected.")
+        elif upper is None:
+            print(f"At least {lower} degrees of separation.")
+        else:
+            print(f"Between {lower} and {upper} degrees of separation.")
+        return
+
+    if args.paths is not None:
+        if not components.connected(source, target):
+            sys.exit("Not connected.")
+        paths = graph.all_shortest_paths(source, target)
+        if args.paths:
+            paths = itertools.islice(paths, args.paths)
+        found = False
+        for i, path in enumerate(paths):
+            if i:
+                print()
+            print_path(source, path, graph)
+            found = True
+        if not found:
+            print("Not connected.")
+        return
+
+    path = search(source, target)
 
     if path is None:
         print("Not connected.")
     else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path, graph)
+
+
+def print_path(source, path, graph=None):
+    """
+    Prints each step of a path from `source`, looking people and movies
+    up in `graph` if given, otherwise in the loaded dicts.
+    """
+    person = graph.person if graph else people.__getitem__
+    movie = graph.movie if graph else movies.__getitem__
 
+    degrees = len(path)
+    print(f"{degrees} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = person(path[i][1])["name"]
+        person2 = person(path[i + 1][1])["name"]
+        title = movie(path[i + 1][0])["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {title}")
 
-def shortest_path(source, target):
+
+def shortest_path(source, target, frontier_class=IndexedQueueFrontier):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `frontier_class` is the queue used for the search; any class with
+    the `QueueFrontier` interface works.
+
     If no possible path, returns None.
     """
 
@@ -102,7 +205,7 @@ def shortest_path(source, target):
     # Initialize the starting node
     start = Node(state=source, parent=None, action=None)
 
-    frontier = QueueFrontier()
+    frontier = frontier_class()
     frontier.add(start)
 
     # Set of explored nodes
@@ -160,18 +263,132 @@ def reconstruct_path(node):
 
         
 
-def person_id_for_name(name):
+def shortest_path_bidirectional(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both
+    ends at once and meeting in the middle.
+
+    If no possible path, returns None.
+    """
+
+    if target == source:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step that
+    # reached them: towards the source going forward, towards the target
+    # going backward
+    forward = {source: None}
+    backward = {target: None}
+
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Expand one full level of whichever side is smaller
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward
+            )
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward
+            )
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_level(frontier, parents, other_parents):
+    """
+    Expands every person in `frontier` by one hop, recording parents.
+
+    Returns the next frontier and the person where the two searches meet
+    on the shortest combined path, or None if they have not met yet.
+    """
+    next_frontier = []
+    meeting = None
+    best = None
+
+    for state in frontier:
+        for movie_id, person_id in neighbors_for_person(state):
+            if person_id in parents:
+                continue
+            parents[person_id] = (movie_id, state)
+            next_frontier.append(person_id)
+
+            # Finish the level so the shortest meeting point wins
+            if person_id in other_parents:
+                length = (path_length(person_id, parents)
+                          + path_length(person_id, other_parents))
+                if best is None or length < best:
+                    best, meeting = length, person_id
+
+    return next_frontier, meeting
+
+
+def path_length(person_id, parents):
+    """
+    Returns the number of hops from `person_id` back to its search root.
+    """
+    length = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        length += 1
+    return length
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Joins the forward and backward search trees through `meeting`
+    into a single source-to-target path.
+    """
+    path = []
+
+    # Walk from the meeting point back to the source
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    # Walk from the meeting point forward to the target
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        path.append((movie_id, person_id))
+
+    return path
+
+
+def person_id_for_name(name, graph=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Looks the name up in `graph` if given, otherwise in the loaded dicts.
+    If the name is unknown, offers close matches and asks again.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = graph.person_ids_for_name(name)
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = suggest_names(name, graph) if name else []
+        if suggestions:
+            print(f"No '{name}'. Did you mean:")
+            for suggestion in suggestions:
+                print(f"  {suggestion}")
+            return person_id_for_name(input("Name: "), graph)
         return None
     elif len(person_ids) > 1: 
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = graph.person(person_id) if graph else people[person_id]
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -186,6 +403,21 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def suggest_names(name, graph=None):
+    """
+    Returns names close to `name`, building the name index on first use.
+    """
+    global name_index
+    if name_index is None:
+        if graph is not None:
+            name_index = NameIndex(graph.person_names)
+        else:
+            name_index = NameIndex(
+                person["name"] for person in people.values()
+            )
+    return name_index.suggest(name)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -199,5 +431,11 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+ENGINES.update({
+    "bfs": shortest_path,
+    "bidirectional": shortest_path_bidirectional,
+})
+
+
 if __name__ == "__main__":
     main()
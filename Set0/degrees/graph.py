@@ -0,0 +1,616 @@
+import csv
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+
+# Typecode for the CSR offset and index arrays (signed 32-bit)
+INDEX_TYPE = "i"
+
+# CSV files a dataset directory is parsed from
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Binary snapshot of the parsed graph, written next to the CSV files
+SNAPSHOT_FILE = "graph.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP\0"
+SNAPSHOT_VERSION = 2
+
+# Graph attributes stored in a snapshot, by kind
+STRING_FIELDS = ["person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years"]
+ARRAY_FIELDS = ["person_offsets", "person_movies",
+                "movie_offsets", "movie_people",
+                "person_order", "movie_order", "name_order"]
+
+
+class SortedIndex():
+    """
+    Read-only mapping from keys to their positions in `keys`, found by
+    binary search over `order`, the positions sorted by key.
+
+    Lookups take O(log n) time but nothing is built on load, so an index
+    over a memory-mapped snapshot is ready immediately.
+    """
+
+    def __init__(self, keys, order, key=None):
+        self.keys = keys
+        self.order = order
+        self.key = key
+
+    def sort_key(self, i):
+        return self.key(self.keys[i]) if self.key else self.keys[i]
+
+    def positions(self, value):
+        """
+        Returns every position holding `value`, in order.
+        """
+        order = self.order
+        i = bisect_left(order, value, key=self.sort_key)
+        positions = []
+        while i < len(order) and self.sort_key(order[i]) == value:
+            positions.append(order[i])
+            i += 1
+        return positions
+
+    def get(self, value, default=None):
+        order = self.order
+        i = bisect_left(order, value, key=self.sort_key)
+        if i < len(order) and self.sort_key(order[i]) == value:
+            return order[i]
+        return default
+
+    def __getitem__(self, value):
+        i = self.get(value)
+        if i is None:
+            raise KeyError(value)
+        return i
+
+    def __contains__(self, value):
+        return self.get(value) is not None
+
+
+class Graph():
+    """
+    Bipartite person-movie graph with person and movie IDs interned
+    to dense integers.
+
+    Adjacency is stored CSR-style: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    stars of movie `m` are `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    People and movies are looked up by ID, and people by lowercase name,
+    through the orders `person_order`, `movie_order` and `name_order`,
+    which sort their indices by that key.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_order=None, movie_order=None, name_order=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        if person_order is None:
+            person_order = sort_order(person_ids)
+        if movie_order is None:
+            movie_order = sort_order(movie_ids)
+        if name_order is None:
+            name_order = sort_order([name.lower() for name in person_names])
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+
+        self.person_index = SortedIndex(person_ids, person_order)
+        self.movie_index = SortedIndex(movie_ids, movie_order)
+        self.names = SortedIndex(person_names, name_order, key=str.lower)
+
+    @property
+    def num_people(self):
+        return len(self.person_ids)
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the IMDB ids of every person with the given name.
+        """
+        return [self.person_ids[i] for i in self.names.positions(name.lower())]
+
+    def person(self, person_id):
+        """
+        Returns the name and birth year of a person.
+        """
+        i = self.person_index[person_id]
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """
+        Returns the title and year of a movie.
+        """
+        i = self.movie_index[movie_id]
+        return {"title": self.movie_titles[i], "year": self.movie_years[i]}
+
+    def degree(self, p):
+        """
+        Returns the number of movies person index `p` starred in.
+        """
+        return self.person_offsets[p + 1] - self.person_offsets[p]
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+
+        s = self.person_index[source]
+        t = self.person_index[target]
+        parent_person, parent_movie = self.bfs(s, t)
+
+        if parent_person[t] == -1:
+            return None
+        return self.path_to(t, parent_person, parent_movie)
+
+    def bfs(self, s, t=None):
+        """
+        Runs breadth-first search from person index `s` over the CSR
+        arrays, stopping early once person index `t` is reached.
+
+        Returns the parent person and parent movie arrays of the search
+        tree; unreached people have a parent of -1 and `s` is its own parent.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        parent_person = array(INDEX_TYPE, [-1]) * self.num_people
+        parent_movie = array(INDEX_TYPE, [-1]) * self.num_people
+        parent_person[s] = s
+
+        # Every star of a movie is reached the first time the movie is
+        # expanded, so no movie needs expanding twice
+        movie_seen = bytearray(self.num_movies)
+
+        frontier = [s]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                for k in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[k]
+                    if movie_seen[m]:
+                        continue
+                    movie_seen[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_people[j]
+                        if parent_person[q] != -1:
+                            continue
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        if q == t:
+                            return parent_person, parent_movie
+                        next_frontier.append(q)
+            frontier = next_frontier
+
+        return parent_person, parent_movie
+
+    def distances(self, s):
+        """
+        Returns an array of hop distances from person index `s` to every
+        person, with -1 for people in other components.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        distance = array(INDEX_TYPE, [-1]) * self.num_people
+        distance[s] = 0
+        movie_seen = bytearray(self.num_movies)
+
+        frontier = [s]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for p in frontier:
+                for k in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[k]
+                    if movie_seen[m]:
+                        continue
+                    movie_seen[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_people[j]
+                        if distance[q] == -1:
+                            distance[q] = depth
+                            next_frontier.append(q)
+            frontier = next_frontier
+
+        return distance
+
+    def shortest_path_dag(self, s, t):
+        """
+        Runs breadth-first search from person index `s` until the level
+        containing person index `t`, recording every parent at minimal depth.
+
+        Returns a dict mapping each person index reached before or at
+        the depth of `t` to its list of (movie, parent person) index pairs,
+        or None if `t` is unreachable.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        parents = {s: []}
+        movie_seen = bytearray(self.num_movies)
+
+        frontier = [s]
+        while frontier and t not in parents:
+
+            # Collect the frontier people in each movie first, so a star
+            # reached through a movie gets all of its parents in it
+            movie_frontier = {}
+            for p in frontier:
+                for k in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[k]
+                    if not movie_seen[m]:
+                        movie_frontier.setdefault(m, []).append(p)
+
+            next_parents = {}
+            for m, ps in movie_frontier.items():
+                movie_seen[m] = 1
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if q in parents:
+                        continue
+                    edges = next_parents.setdefault(q, [])
+                    edges.extend((m, p) for p in ps)
+
+            parents.update(next_parents)
+            frontier = list(next_parents)
+
+        return parents if t in parents else None
+
+    def all_shortest_paths(self, source, target):
+        """
+        Yields every shortest list of (movie_id, person_id) pairs that
+        connects the source to the target, one at a time.
+
+        Paths are generated lazily from the BFS DAG, so only the path
+        being yielded is held in memory. Yields nothing if no path exists.
+        """
+        if source == target:
+            yield []
+            return
+
+        s = self.person_index[source]
+        t = self.person_index[target]
+        parents = self.shortest_path_dag(s, t)
+        if parents is None:
+            return
+
+        # Depth-first walk from the target back to the source, keeping
+        # one iterator over parent edges per step of the current path
+        steps = []
+        stack = [iter(parents[t])]
+        person = t
+        while stack:
+            edge = next(stack[-1], None)
+            if edge is None:
+                stack.pop()
+                if steps:
+                    _, person = steps.pop()
+                continue
+
+            steps.append((edge[0], person))
+            person = edge[1]
+            if person == s:
+                yield [
+                    (self.movie_ids[m], self.person_ids[q])
+                    for m, q in reversed(steps)
+                ]
+                _, person = steps.pop()
+            else:
+                stack.append(iter(parents[person]))
+
+    def k_shortest_paths(self, source, target, k):
+        """
+        Returns up to `k` of the shortest paths between the source
+        and the target.
+        """
+        return list(itertools.islice(
+            self.all_shortest_paths(source, target), k
+        ))
+
+    def count_shortest_paths(self, source, target):
+        """
+        Returns the number of shortest paths between the source and
+        the target, without enumerating them.
+        """
+        if source == target:
+            return 1
+
+        s = self.person_index[source]
+        t = self.person_index[target]
+        parents = self.shortest_path_dag(s, t)
+        if parents is None:
+            return 0
+
+        # Parents are inserted level by level, so counts are ready
+        # by the time each person is reached
+        counts = {}
+        for person, edges in parents.items():
+            counts[person] = sum(counts[p] for _, p in edges) if edges else 1
+        return counts[t]
+
+    def path_to(self, t, parent_person, parent_movie):
+        """
+        Returns the (movie_id, person_id) path from the root of a BFS
+        tree to person index `t`.
+        """
+        path = []
+        while parent_person[t] != t:
+            path.append((self.movie_ids[parent_movie[t]], self.person_ids[t]))
+            t = parent_person[t]
+        path.reverse()
+        return path
+
+
+def load_graph(directory, cache=True):
+    """
+    Load data from CSV files into a CSR Graph.
+
+    If `cache` is true, a binary snapshot of the parsed graph is kept
+    next to the CSV files and memory-mapped on later loads, as long as
+    the CSV files have not changed since it was written.
+    """
+    if not cache:
+        return parse_csv(directory)
+
+    path = os.path.join(directory, SNAPSHOT_FILE)
+    key = snapshot_key(directory)
+
+    graph = load_snapshot(path, key)
+    if graph is None:
+        graph = parse_csv(directory)
+        try:
+            save_snapshot(graph, path, key)
+        except OSError:
+            pass
+    return graph
+
+
+def parse_csv(directory):
+    """
+    Parse the CSV files in `directory` into a CSR Graph.
+    """
+    person_ids, person_names, person_births = [], [], []
+    movie_ids, movie_titles, movie_years = [], [], []
+
+    # Load people
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for person_id, name, birth in reader:
+            person_ids.append(person_id)
+            person_names.append(name)
+            person_births.append(birth)
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for movie_id, title, year in reader:
+            movie_ids.append(movie_id)
+            movie_titles.append(title)
+            movie_years.append(year)
+
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+    # Load stars, dropping unknown IDs and duplicate rows
+    edges = set()
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for person_id, movie_id in reader:
+            p = person_index.get(person_id)
+            m = movie_index.get(movie_id)
+            if p is not None and m is not None:
+                edges.add((p, m))
+    edges = sorted(edges)
+
+    person_offsets, person_movies = build_csr(
+        len(person_ids), edges, key=0
+    )
+    movie_offsets, movie_people = build_csr(
+        len(movie_ids), edges, key=1
+    )
+
+    return Graph(person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people)
+
+
+def sort_order(keys):
+    """
+    Returns the positions of `keys` sorted by key, ties in order.
+    """
+    return array(INDEX_TYPE, sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def build_csr(size, edges, key):
+    """
+    Builds CSR offset and index arrays over `size` rows from a sorted
+    list of (person, movie) edges, using element `key` of each edge as
+    the row.
+    """
+    offsets = array(INDEX_TYPE, [0]) * (size + 1)
+    for edge in edges:
+        offsets[edge[key] + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    indices = array(INDEX_TYPE, [0]) * len(edges)
+    cursor = array(INDEX_TYPE, offsets[:-1])
+    for edge in edges:
+        row = edge[key]
+        indices[cursor[row]] = edge[1 - key]
+        cursor[row] += 1
+
+    return offsets, indices
+
+
+def snapshot_key(directory):
+    """
+    Returns the modification times and sizes of the CSV files,
+    which a snapshot must match to be used.
+    """
+    key = []
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        key.append([filename, stat.st_mtime_ns, stat.st_size])
+    return key
+
+
+def save_snapshot(graph, path, key):
+    """
+    Writes `graph` to a binary snapshot at `path`, each string field as
+    a NUL-separated UTF-8 blob and each array field as raw machine
+    integers.
+    """
+    blobs = []
+    for field in STRING_FIELDS:
+        blobs.append("\0".join(getattr(graph, field)).encode("utf-8"))
+    for field in ARRAY_FIELDS:
+        blobs.append(getattr(graph, field).tobytes())
+
+    header = {
+        "itemsize": array(INDEX_TYPE).itemsize,
+        "counts": [len(getattr(graph, field)) for field in STRING_FIELDS],
+    }
+    write_file(path, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, key, header, blobs)
+
+
+def load_snapshot(path, key):
+    """
+    Returns the Graph stored in the snapshot at `path`, with its arrays
+    memory-mapped from the file.
+
+    Returns None if there is no usable snapshot: it is missing, written
+    by another version or platform, or stale with respect to `key`.
+    """
+    stored = read_file(path, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, key)
+    if stored is None:
+        return None
+    header, sections = stored
+    if (header.get("itemsize") != array(INDEX_TYPE).itemsize
+            or len(header.get("counts", [])) != len(STRING_FIELDS)
+            or len(sections) != len(STRING_FIELDS) + len(ARRAY_FIELDS)):
+        return None
+
+    sections = iter(sections)
+    fields = {}
+    for field, count in zip(STRING_FIELDS, header["counts"]):
+        text = str(next(sections), "utf-8")
+        fields[field] = text.split("\0") if count else []
+    for field in ARRAY_FIELDS:
+        fields[field] = next(sections).cast(INDEX_TYPE)
+
+    return Graph(**fields)
+
+
+def write_file(path, magic, version, key, header, blobs):
+    """
+    Writes a binary file of `blobs` that `read_file` reads back.
+
+    The file is a magic string, then the version and the length of a
+    JSON header as little-endian integers, then the header, then each
+    blob aligned for memory mapping. The header holds the fields of
+    `header` along with the dataset `key`, the byte order and where each
+    blob starts and ends.
+    """
+    header = dict(header, key=key, byteorder=sys.byteorder)
+
+    # Blobs are placed after the header, so size it with placeholder
+    # offsets that are at least as wide as the real ones
+    prefix = len(magic) + struct.calcsize("<II")
+    header["sections"] = [[2 ** 62, len(blob)] for blob in blobs]
+    offset = prefix + len(json.dumps(header).encode("utf-8"))
+    sections = []
+    for blob in blobs:
+        offset = align(offset)
+        sections.append([offset, len(blob)])
+        offset += len(blob)
+    header["sections"] = sections
+    encoded = json.dumps(header).encode("utf-8")
+
+    # Write to a temporary file first so readers never see a partial file
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<II", version, len(encoded)))
+        f.write(encoded)
+        for (offset, _), blob in zip(sections, blobs):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(blob)
+    os.replace(temporary, path)
+
+
+def read_file(path, magic, version, key):
+    """
+    Returns the header and the blobs, as memory-mapped views, of a file
+    written by `write_file`.
+
+    Returns None if the file is missing or unreadable, written by
+    another version or platform, or stale with respect to `key`.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        prefix = len(magic) + struct.calcsize("<II")
+        if buffer[:len(magic)] != magic:
+            return None
+        file_version, length = struct.unpack("<II", buffer[len(magic):prefix])
+        if file_version != version:
+            return None
+        header = json.loads(buffer[prefix:prefix + length])
+        if header["key"] != key or header["byteorder"] != sys.byteorder:
+            return None
+
+        view = memoryview(buffer)
+        sections = []
+        for offset, size in header["sections"]:
+            if offset < prefix + length or offset + size > len(buffer):
+                return None
+            sections.append(view[offset:offset + size])
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None
+    return header, sections
+
+
+def align(offset, boundary=8):
+    """
+    Rounds `offset` up to a multiple of `boundary`.
+    """
+    return -(-offset // boundary) * boundary
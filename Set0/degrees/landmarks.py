@@ -0,0 +1,261 @@
+"""
+Landmark distance index for the degrees graph.
+
+Stores BFS distances from a handful of high-degree landmark people.
+By the triangle inequality these give instant lower and upper bounds on
+the separation of any two people, and an admissible heuristic for an
+A* search (ALT) over the graph's neighbors.
+
+Usage: python landmarks.py [directory] [count]
+"""
+
+import heapq
+import os
+import sys
+import time
+from array import array
+
+from graph import load_graph, read_file, snapshot_key, write_file
+
+# Number of landmarks picked by default
+LANDMARKS = 16
+
+INDEX_FILE = "landmarks.index"
+INDEX_MAGIC = b"DEGLMRK\0"
+INDEX_VERSION = 2
+
+# Distances are stored one byte per person; longer distances are
+# clamped, and people a landmark cannot reach are marked separately
+DISTANCE_TYPE = "B"
+MAX_DISTANCE = 254
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+
+    def __init__(self, graph, landmarks, distances):
+        """
+        `landmarks` are person indices and `distances[i]` holds the
+        distance from `landmarks[i]` to every person.
+        """
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=LANDMARKS):
+        """
+        Picks the `count` people with the most movies as landmarks and
+        runs a BFS from each.
+        """
+        landmarks = sorted(range(graph.num_people),
+                           key=graph.degree, reverse=True)[:count]
+        distances = [to_bytes(graph.distances(landmark))
+                     for landmark in landmarks]
+        return cls(graph, landmarks, distances)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        the source and the target.
+
+        `lower` is None if some landmark proves the two are disconnected;
+        `upper` is None if no landmark reaches both.
+        """
+        s = self.graph.person_index[source]
+        t = self.graph.person_index[target]
+        if s == t:
+            return 0, 0
+
+        lower, upper = 1, None
+        for distance in self.distances:
+            ds, dt = distance[s], distance[t]
+            if (ds == UNREACHABLE) != (dt == UNREACHABLE):
+                return None, None
+            if ds == UNREACHABLE:
+                continue
+            lower = max(lower, abs(ds - dt))
+            if ds < MAX_DISTANCE and dt < MAX_DISTANCE:
+                if upper is None or ds + dt < upper:
+                    upper = ds + dt
+        return lower, upper
+
+    def heuristic(self, s, t):
+        """
+        Returns a function giving a lower bound on the distance from any
+        person index in the component of person index `s` to person
+        index `t`, or None if `s` cannot reach `t`.
+        """
+        targets = []
+        for distance in self.distances:
+            ds, dt = distance[s], distance[t]
+            if (ds == UNREACHABLE) != (dt == UNREACHABLE):
+                return None
+
+            # A landmark reaching `t` reaches its whole component, so
+            # estimates never need checking for unreachable people
+            if dt != UNREACHABLE:
+                targets.append((distance, dt))
+
+        def h(p):
+            best = 0
+            for distance, dt in targets:
+                estimate = abs(distance[p] - dt)
+                if estimate > best:
+                    best = estimate
+            return best
+
+        return h
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using A* search guided
+        by the landmark bounds.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        if source == target:
+            return []
+
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        h = self.heuristic(s, t)
+        if h is None:
+            return None
+
+        # Depth of the shallowest star each movie was expanded from: the
+        # cast of a movie only needs reading again from a shallower star
+        movie_depth = {}
+
+        # Ties on f are broken towards deeper nodes, which are closer
+        # to the target
+        depth = {s: 0}
+        parent = {s: None}
+        heap = [(h(s), 0, s)]
+        while heap:
+            _, d, p = heapq.heappop(heap)
+            if p == t:
+                break
+            d = -d
+            if d > depth[p]:
+                continue
+            for k in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[k]
+                if movie_depth.get(m, d + 1) <= d:
+                    continue
+                movie_depth[m] = d
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if q in depth and depth[q] <= d + 1:
+                        continue
+                    depth[q] = d + 1
+                    parent[q] = (m, p)
+                    heapq.heappush(heap, (d + 1 + h(q), -d - 1, q))
+        else:
+            return None
+
+        path = []
+        while parent[t] is not None:
+            m, p = parent[t]
+            path.append((graph.movie_ids[m], graph.person_ids[t]))
+            t = p
+        path.reverse()
+        return path
+
+    def save(self, path, key):
+        """
+        Writes the index to `path`, tagged with the dataset key it was
+        built from.
+        """
+        header = {
+            "num_people": self.graph.num_people,
+            "landmarks": [self.graph.person_ids[p] for p in self.landmarks],
+        }
+        blobs = [distance.tobytes() for distance in self.distances]
+        write_file(path, INDEX_MAGIC, INDEX_VERSION, key, header, blobs)
+
+    @classmethod
+    def load(cls, graph, path, key):
+        """
+        Returns the index stored at `path`, or None if it is missing,
+        unreadable, from another version or built from different data.
+        """
+        stored = read_file(path, INDEX_MAGIC, INDEX_VERSION, key)
+        if stored is None:
+            return None
+        header, distances = stored
+        landmark_ids = header.get("landmarks", [])
+        if (header.get("num_people") != graph.num_people
+                or len(distances) != len(landmark_ids)
+                or any(len(distance) != graph.num_people
+                       for distance in distances)):
+            return None
+
+        landmarks = [graph.person_index.get(p) for p in landmark_ids]
+        if None in landmarks:
+            return None
+        return cls(graph, landmarks, distances)
+
+
+def to_bytes(distance):
+    """
+    Converts an array of BFS distances to one byte per person, clamping
+    long distances and marking unreached people.
+    """
+    if max(distance, default=0) <= MAX_DISTANCE:
+        # Every distance fits in the low byte of its integer, and -1
+        # has a low byte of 255, which is UNREACHABLE
+        itemsize = distance.itemsize
+        start = 0 if sys.byteorder == "little" else itemsize - 1
+        return array(DISTANCE_TYPE, distance.tobytes()[start::itemsize])
+    return array(DISTANCE_TYPE, bytes(
+        UNREACHABLE if d == -1 else min(d, MAX_DISTANCE) for d in distance
+    ))
+
+
+def load_index(graph, directory, count=LANDMARKS):
+    """
+    Loads the landmark index kept next to the CSV files, building and
+    saving it first if it is missing or stale.
+    """
+    path = os.path.join(directory, INDEX_FILE)
+    key = snapshot_key(directory)
+    index = LandmarkIndex.load(graph, path, key)
+    if index is None or len(index.landmarks) != min(count, graph.num_people):
+        index = LandmarkIndex.build(graph, count)
+        try:
+            index.save(path, key)
+        except OSError:
+            pass
+    return index
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python landmarks.py [directory] [count]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else LANDMARKS
+
+    print("Loading data...")
+    graph = load_graph(directory)
+    print("Data loaded.")
+
+    start = time.perf_counter()
+    index = LandmarkIndex.build(graph, count)
+    index.save(os.path.join(directory, INDEX_FILE), snapshot_key(directory))
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {len(index.landmarks)} landmarks in {elapsed:.2f}s.")
+    for p in index.landmarks:
+        print(f"  {graph.person_names[p]} ({graph.person_ids[p]}): "
+              f"{graph.degree(p)} movies")
+
+
+if __name__ == "__main__":
+    main()
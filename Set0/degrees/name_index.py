@@ -0,0 +1,107 @@
+"""
+Prefix and edit-distance-1 name suggestions for the degrees dataset.
+"""
+
+from bisect import bisect_left
+
+# Most suggestions returned for one name
+SUGGESTIONS = 10
+
+
+class NameIndex():
+    """
+    Index over distinct lowercase names.
+
+    Prefix queries bisect a sorted array of names. Edit-distance-1
+    queries use the pigeonhole principle: a single edit to a name leaves
+    either its first half or its second half intact, so every name is
+    posted under (length, first half) and (length, second half), and a
+    query only has to verify the few names sharing one of those keys.
+    """
+
+    def __init__(self, names):
+        """
+        Builds the index from an iterable of display names.
+        """
+        # Maps each lowercase name to the first display name seen for it
+        self.display = {}
+        for name in names:
+            self.display.setdefault(name.lower(), name)
+
+        self.sorted_names = sorted(self.display)
+        self.halves = {}
+        for i, name in enumerate(self.sorted_names):
+            n = len(name)
+            h = n // 2
+            self.halves.setdefault((n, 0, name[:h]), []).append(i)
+            self.halves.setdefault((n, 1, name[h:]), []).append(i)
+
+    def __len__(self):
+        return len(self.sorted_names)
+
+    def prefix(self, prefix, limit=SUGGESTIONS):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        names = []
+        i = bisect_left(self.sorted_names, prefix)
+        while (i < len(self.sorted_names) and len(names) < limit
+               and self.sorted_names[i].startswith(prefix)):
+            names.append(self.display[self.sorted_names[i]])
+            i += 1
+        return names
+
+    def similar(self, name, limit=SUGGESTIONS):
+        """
+        Returns up to `limit` names within one insertion, deletion or
+        substitution of `name`, other than `name` itself, in order.
+        """
+        name = name.lower()
+        found = set()
+        for n in (len(name) - 1, len(name), len(name) + 1):
+            if n < 0:
+                continue
+            h = n // 2
+            keys = [(n, 0, name[:h])]
+            if n - h <= len(name):
+                keys.append((n, 1, name[len(name) - (n - h):]))
+            for key in keys:
+                for i in self.halves.get(key, ()):
+                    candidate = self.sorted_names[i]
+                    if candidate != name and within_one_edit(name, candidate):
+                        found.add(i)
+        return [self.display[self.sorted_names[i]]
+                for i in sorted(found)[:limit]]
+
+    def suggest(self, name, limit=SUGGESTIONS):
+        """
+        Returns up to `limit` names close to `name`: near misses first,
+        then names it is a prefix of.
+        """
+        suggestions = self.similar(name, limit)
+        for match in self.prefix(name, limit):
+            if len(suggestions) >= limit:
+                break
+            if match not in suggestions and match.lower() != name.lower():
+                suggestions.append(match)
+        return suggestions
+
+
+def within_one_edit(a, b):
+    """
+    Returns True if `a` and `b` differ by at most one insertion,
+    deletion or substitution.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+
+    # Skip the common prefix, then the rest must match after one edit
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
@@ -0,0 +1,179 @@
+"""
+Long-running degrees query server.
+
+Loads the graph once and answers shortest-path queries over HTTP on a
+TCP port or a Unix socket:
+
+    GET /path?source=NAME_OR_ID&target=NAME_OR_ID
+    GET /metrics
+"""
+
+import asyncio
+import functools
+import json
+import statistics
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from batch import resolve
+from components import load_components
+from graph import load_graph
+from name_index import NameIndex
+
+# Number of recent path results kept in the LRU cache
+CACHE_SIZE = 4096
+
+# Number of recent request latencies kept for metrics
+LATENCY_WINDOW = 1000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict"}
+
+
+class Server():
+
+    def __init__(self, graph, components=None, cache_size=CACHE_SIZE):
+        self.graph = graph
+        self.name_index = NameIndex(graph.person_names)
+        search = graph.shortest_path
+        if components is not None:
+            search = components.guard(search)
+        self.shortest_path = functools.lru_cache(maxsize=cache_size)(search)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.started = time.time()
+
+    async def handle(self, reader, writer):
+        """
+        Handles one HTTP request per connection.
+        """
+        start = time.perf_counter()
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            status, body = await self.respond(request.decode("latin-1"))
+        except (UnicodeDecodeError, ValueError):
+            status, body = 400, {"error": "malformed request"}
+
+        elapsed = time.perf_counter() - start
+        self.requests += 1
+        self.latencies.append(elapsed)
+        body["elapsed_ms"] = round(elapsed * 1000, 3)
+
+        payload = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + payload
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def respond(self, request):
+        """
+        Returns the status and JSON body for an HTTP request line.
+        """
+        method, target, _ = request.split(" ", 2)
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+
+        url = urlsplit(target)
+        if url.path == "/metrics":
+            return 200, self.metrics()
+        if url.path != "/path":
+            return 404, {"error": f"no such endpoint: {url.path}"}
+
+        query = parse_qs(url.query)
+        if "source" not in query or "target" not in query:
+            return 400, {"error": "source and target are required"}
+
+        ids = []
+        for value in (query["source"][0], query["target"][0]):
+            person_id = resolve(self.graph, value)
+            if person_id is None:
+                candidates = self.graph.person_ids_for_name(value)
+                if not candidates:
+                    return 404, {
+                        "error": f"person not found: {value}",
+                        "suggestions": self.name_index.suggest(value),
+                    }
+                return 409, {
+                    "error": f"ambiguous name: {value}",
+                    "candidates": [
+                        dict(self.graph.person(person_id), id=person_id)
+                        for person_id in candidates
+                    ],
+                }
+            ids.append(person_id)
+
+        # Searches are CPU-bound, so keep them off the event loop
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(None, self.shortest_path, *ids)
+
+        return 200, {
+            "source": ids[0],
+            "target": ids[1],
+            "degrees": None if path is None else len(path),
+            "path": path,
+        }
+
+    def metrics(self):
+        """
+        Returns request counts, latency percentiles and cache statistics.
+        """
+        latencies = sorted(self.latencies)
+        cache = self.shortest_path.cache_info()
+        metrics = {
+            "requests": self.requests,
+            "uptime_s": round(time.time() - self.started, 3),
+            "cache": {"hits": cache.hits, "misses": cache.misses,
+                      "size": cache.currsize, "max_size": cache.maxsize},
+        }
+        if latencies:
+            metrics["latency_ms"] = {
+                "mean": round(statistics.fmean(latencies) * 1000, 3),
+                "p50": round(percentile(latencies, 0.5) * 1000, 3),
+                "p95": round(percentile(latencies, 0.95) * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3),
+            }
+        return metrics
+
+
+def percentile(values, fraction):
+    """
+    Returns the given percentile of a sorted, non-empty list.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def serve(graph, address, components=None):
+    """
+    Serves queries on `address`, either HOST:PORT or a Unix socket path.
+    """
+    server = Server(graph, components)
+    host, _, port = address.rpartition(":")
+    if port.isdigit():
+        listener = await asyncio.start_server(
+            server.handle, host or "127.0.0.1", int(port)
+        )
+    else:
+        listener = await asyncio.start_unix_server(server.handle, address)
+    print(f"Serving on {address}.")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(directory, address, cache=True):
+    print("Loading data...")
+    graph = load_graph(directory, cache=cache)
+    components = load_components(graph, directory)
+    print("Data loaded.")
+    try:
+        asyncio.run(serve(graph, address, components))
+    except KeyboardInterrupt:
+        pass
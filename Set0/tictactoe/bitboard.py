@@ -0,0 +1,534 @@
+"""
+Bitboard engine for Tic Tac Toe.
+
+Run as a script to compare the nodes searched for the first move with
+and without move ordering:
+
+    python bitboard.py [size] [k] [seconds]
+
+A position is a pair of integers (x, o): bit i * size + j of `x` is set
+if X has played cell (i, j), and likewise for `o`.
+"""
+
+import functools
+import json
+import math
+import os
+import sys
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Transposition table entry kinds: an exact value, or a bound from a
+# search that failed high (lower bound) or low (upper bound)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Value of a won position, before the bonus for winning early; heuristic
+# scores stay well below it on any board that fits on screen
+WIN = 10 ** 12
+
+# Default thinking time per move, in seconds, for boards that cannot be
+# searched to the end
+TIME_BUDGET = 1.0
+
+# Transposition table entries kept before the table is cleared, so the
+# shared engines do not grow without bound over a long session
+MAX_TABLE_ENTRIES = 2 ** 18
+
+
+class Timeout(Exception):
+    pass
+
+
+def line_masks(size, k):
+    """
+    Returns the bitmask of every run of `k` cells in a row, column
+    or diagonal of the board.
+    """
+    def mask(cells):
+        return sum(1 << (i * size + j) for i, j in cells)
+
+    lines = []
+    for i in range(size):
+        for j in range(size):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                if 0 <= end_i < size and 0 <= end_j < size:
+                    lines.append(mask(
+                        (i + di * step, j + dj * step) for step in range(k)
+                    ))
+    return lines
+
+
+def symmetries(size):
+    """
+    Returns the 8 rotations and reflections of the board, each as a list
+    mapping a bit index to the bit index it moves to.
+    """
+    n = size - 1
+    maps = [
+        lambda i, j: (i, j),
+        lambda i, j: (j, n - i),
+        lambda i, j: (n - i, n - j),
+        lambda i, j: (n - j, i),
+        lambda i, j: (i, n - j),
+        lambda i, j: (n - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (n - j, n - i),
+    ]
+    return [
+        [size * a + b for a, b in (f(*divmod(cell, size))
+                                   for cell in range(size * size))]
+        for f in maps
+    ]
+
+
+def row_tables(size, permutation):
+    """
+    Returns, for each row, a table mapping that row's bits to the
+    permuted bits of the whole board, so masks map in `size` lookups.
+    """
+    tables = []
+    for i in range(size):
+        table = []
+        for bits in range(1 << size):
+            mask = 0
+            for j in range(size):
+                if bits >> j & 1:
+                    mask |= 1 << permutation[i * size + j]
+            table.append(mask)
+        tables.append(table)
+    return tables
+
+
+class Engine():
+    """
+    Search engine for a `size` x `size` board where `k` in a row wins.
+    """
+
+    def __init__(self, size=3, k=None, ordering=True):
+        self.size = size
+        self.k = k or size
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+        self.row = (1 << size) - 1
+        self.lines = line_masks(size, self.k)
+
+        # Cells on more lines are tried first: the center, then corners
+        self.priority = [
+            sum(1 for line in self.lines if line >> cell & 1)
+            for cell in range(self.cells)
+        ]
+        self.ordering = ordering
+
+        # Per search: two killer moves for each number of stones on the
+        # board, and a history score for each cell
+        self.killers = [[None, None] for _ in range(self.cells + 1)]
+        self.history = [0] * self.cells
+
+        # Positions searched by the last call to minimax
+        self.nodes = 0
+
+        self.symmetries = symmetries(size)
+        self.inverses = [
+            [permutation.index(cell) for cell in range(self.cells)]
+            for permutation in self.symmetries
+        ]
+        self.symmetry_tables = [
+            row_tables(size, permutation) for permutation in self.symmetries
+        ]
+
+        # Transposition table shared by searches, keyed by canonical position
+        self.table = {}
+
+        # Set while searching: when to give up, and an optional event
+        # that stops the search early
+        self.deadline = None
+        self.cancelled = None
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) bitmasks of a list-based board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (i * self.size + j)
+                elif cell == O:
+                    o |= 1 << (i * self.size + j)
+        return x, o
+
+    def to_board(self, x, o):
+        """
+        Returns the list-based board for (x, o) bitmasks.
+        """
+        size = self.size
+        return [[X if x >> (i * size + j) & 1
+                 else O if o >> (i * size + j) & 1
+                 else EMPTY for j in range(size)] for i in range(size)]
+
+    def to_action(self, move):
+        """
+        Returns the (i, j) action for a bit index.
+        """
+        return divmod(move, self.size)
+
+    def player(self, x, o):
+        """
+        Returns player who has the next turn.
+        """
+        return X if x.bit_count() == o.bit_count() else O
+
+    def moves(self, x, o):
+        """
+        Yields the bit index of every empty cell.
+        """
+        empty = self.full & ~(x | o)
+        while empty:
+            low = empty & -empty
+            yield low.bit_length() - 1
+            empty ^= low
+
+    def ordered_moves(self, x, o, hash_move):
+        """
+        Returns the empty cells in the order to search them: the
+        transposition table's best move, then killer moves, then by
+        history score and finally by how many lines pass through a cell.
+        """
+        moves = list(self.moves(x, o))
+        if not self.ordering:
+            return moves
+        killers = self.killers[(x | o).bit_count()]
+        history, priority = self.history, self.priority
+        moves.sort(key=lambda move: (
+            move == hash_move, move in killers, history[move], priority[move]
+        ), reverse=True)
+        return moves
+
+    def record_cutoff(self, x, o, move, depth):
+        """
+        Remembers a move that caused a cutoff as a killer for positions
+        with as many stones, and credits it in the history table.
+        """
+        killers = self.killers[(x | o).bit_count()]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] += depth * depth
+
+    def has_line(self, mask):
+        """
+        Returns True if `mask` covers a complete line.
+        """
+        for line in self.lines:
+            if mask & line == line:
+                return True
+        return False
+
+    def winner(self, x, o):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, x, o):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (x | o) == self.full or self.has_line(x) or self.has_line(o)
+
+    def utility(self, x, o):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1}.get(self.winner(x, o), 0)
+
+    def win_value(self, x, o):
+        """
+        Returns the score of a won position for the winner, larger the
+        more cells are still empty so that quicker wins are preferred.
+        """
+        return WIN + self.cells - (x | o).bit_count()
+
+    def evaluate(self, x, o):
+        """
+        Returns a heuristic score of a non-terminal position from X's
+        point of view, rewarding lines that only one player occupies.
+        """
+        score = 0
+        for line in self.lines:
+            xs = (x & line).bit_count()
+            os = (o & line).bit_count()
+            if xs and not os:
+                score += 10 ** xs
+            elif os and not xs:
+                score -= 10 ** os
+        return score
+
+    def transform(self, mask, tables):
+        """
+        Returns `mask` with every bit moved by a symmetry's row tables.
+        """
+        row, size = self.row, self.size
+        result = 0
+        for table in tables:
+            result |= table[mask & row]
+            mask >>= size
+        return result
+
+    def canonical(self, x, o):
+        """
+        Returns the canonical key of a position, the smallest encoding
+        over its 8 symmetries, and the index of the symmetry that
+        produced it.
+        """
+        best_key, best_symmetry = None, None
+        for symmetry, tables in enumerate(self.symmetry_tables):
+            key = (self.transform(x, tables) << self.cells
+                   | self.transform(o, tables))
+            if best_key is None or key < best_key:
+                best_key, best_symmetry = key, symmetry
+        return best_key, best_symmetry
+
+    def probe(self, x, o, alpha, beta, depth):
+        """
+        Looks a position up in the transposition table.
+
+        Returns its key and symmetry, the stored value and move if an
+        entry searched at least `depth` deep settles the search within
+        the window, else None, and the stored move of any entry to try
+        first, else None.
+
+        Bounds are only used for cutoffs and never narrow the window,
+        since a search that fails low against a narrowed window picks its
+        move among upper bounds.
+        """
+        key, symmetry = self.canonical(x, o)
+        entry = self.table.get(key)
+        if entry is None:
+            return key, symmetry, None, None
+
+        value, flag, move, searched = entry
+        if move is not None:
+            move = self.inverses[symmetry][move]
+        if searched >= depth and (flag == EXACT
+                                  or flag == LOWER and value >= beta
+                                  or flag == UPPER and value <= alpha):
+            return key, symmetry, (value, move), move
+        return key, symmetry, None, move
+
+    def store(self, key, symmetry, value, move, alpha, beta, depth):
+        """
+        Records a search result, given the window and depth it was
+        searched with.
+        """
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (
+            value, flag, self.symmetries[symmetry][move], depth
+        )
+
+    def minimax(self, x, o, time_budget=TIME_BUDGET, cancelled=None):
+        """
+        Returns the bit index of the best move for the current player,
+        or None if the game is over.
+
+        Searches with iterative deepening until the game is solved or
+        `time_budget` seconds have passed, then plays the best move of
+        the deepest completed search. A budget of None searches to the end.
+        Setting the `cancelled` event, if given, stops the search early
+        just like running out of time.
+        """
+        move, _, _ = self.iterative_deepening(x, o, time_budget, cancelled)
+        return move
+
+    def iterative_deepening(self, x, o, time_budget=TIME_BUDGET,
+                            cancelled=None):
+        """
+        Returns the best move, its value and the depth it was found at.
+        """
+        if self.terminal(x, o):
+            return None, self.utility(x, o), 0
+
+        empty = self.cells - (x | o).bit_count()
+        search = self.max_value if self.player(x, o) == X else self.min_value
+        self.deadline = (None if time_budget is None
+                         else time.perf_counter() + time_budget)
+        self.cancelled = cancelled
+
+        if len(self.table) > MAX_TABLE_ENTRIES:
+            self.table.clear()
+
+        self.nodes = 0
+        for killers in self.killers:
+            killers[:] = [None, None]
+        self.history = [0] * self.cells
+
+        best = None
+        try:
+            for depth in range(1, empty + 1):
+                value, move = search(x, o, -math.inf, math.inf, depth)
+                best = move, value, depth
+
+                # Stop once the outcome is decided
+                if abs(value) >= WIN:
+                    break
+        except Timeout:
+            pass
+        finally:
+            self.deadline = None
+            self.cancelled = None
+
+        # Always have a move, even if not a single depth finished in time
+        if best is None:
+            best = next(self.moves(x, o)), 0, 0
+        return best
+
+    def check_deadline(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise Timeout
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise Timeout
+
+    def max_value(self, x, o, alpha, beta, depth):
+        """
+        Returns the value and best move for X, who is to move,
+        searching `depth` plies ahead.
+        """
+        self.nodes += 1
+
+        # Only O can have just completed a line
+        if self.has_line(o):
+            return -self.win_value(x, o), None
+        if (x | o) == self.full:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(x, o), None
+        self.check_deadline()
+
+        window = alpha, beta
+        key, symmetry, hit, hash_move = self.probe(x, o, alpha, beta, depth)
+        if hit is not None:
+            return hit
+
+        v = -math.inf
+        best_move = None
+        for move in self.ordered_moves(x, o, hash_move):
+            value, _ = self.min_value(x | 1 << move, o, alpha, beta, depth - 1)
+            if value > v:
+                v, best_move = value, move
+            alpha = max(v, alpha)
+            if alpha >= beta:
+                self.record_cutoff(x, o, move, depth)
+                break
+
+        self.store(key, symmetry, v, best_move, *window, depth)
+        return v, best_move
+
+    def min_value(self, x, o, alpha, beta, depth):
+        """
+        Returns the value and best move for O, who is to move,
+        searching `depth` plies ahead.
+        """
+        self.nodes += 1
+
+        # Only X can have just completed a line
+        if self.has_line(x):
+            return self.win_value(x, o), None
+        if (x | o) == self.full:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(x, o), None
+        self.check_deadline()
+
+        window = alpha, beta
+        key, symmetry, hit, hash_move = self.probe(x, o, alpha, beta, depth)
+        if hit is not None:
+            return hit
+
+        v = math.inf
+        best_move = None
+        for move in self.ordered_moves(x, o, hash_move):
+            value, _ = self.max_value(x, o | 1 << move, alpha, beta, depth - 1)
+            if value < v:
+                v, best_move = value, move
+            beta = min(v, beta)
+            if beta <= alpha:
+                self.record_cutoff(x, o, move, depth)
+                break
+
+        self.store(key, symmetry, v, best_move, *window, depth)
+        return v, best_move
+
+    def save_table(self, path):
+        """
+        Writes the transposition table to a JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump({"size": self.size, "k": self.k, "entries": [
+                [key, *entry] for key, entry in self.table.items()
+            ]}, f)
+
+    def load_table(self, path):
+        """
+        Adds the entries of a transposition table file to the table,
+        ignoring files that are missing, unreadable or written for
+        another board.
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data["size"] != self.size or data["k"] != self.k:
+                return self.table
+            entries = {key: tuple(entry) for key, *entry in data["entries"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            return self.table
+        self.table.update(entries)
+        return self.table
+
+
+@functools.lru_cache(maxsize=None)
+def engine(size, k):
+    """
+    Returns the shared engine, and so the shared transposition table,
+    for a board size and win length.
+    """
+    return Engine(size, k)
+
+
+def table_path(size, k):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        f"{size}x{size}-{k}.table")
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python bitboard.py [size] [k] [seconds]")
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    time_budget = float(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    for ordering in (False, True):
+        engine = Engine(size, k, ordering)
+        start = time.perf_counter()
+        move, value, depth = engine.iterative_deepening(0, 0, time_budget)
+        elapsed = time.perf_counter() - start
+        name = "ordered" if ordering else "unordered"
+        print(f"{name:>9}: {engine.nodes} nodes to depth {depth} "
+              f"in {elapsed:.3f}s, move {engine.to_action(move)}, "
+              f"value {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Perfect-play opening book for Tic Tac Toe.
+
+The solver walks every position reachable from the empty board on a
+bitboard engine, and records the best move and game value of each one
+in a byte array indexed by the position read as a base-3 number, so the
+AI answers from the book with a single lookup.
+
+Usage: python book.py [size] [k]
+"""
+
+import functools
+import os
+import struct
+import sys
+import time
+
+import bitboard
+from bitboard import X, O, EMPTY
+
+BOOK_MAGIC = b"TTTBOOK\0"
+BOOK_VERSION = 1
+
+# Boards with more cells have too many positions to solve in Python
+MAX_CELLS = 9
+
+# Entry of positions that are terminal or not reachable in play
+NO_MOVE = 255
+
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+
+
+class Book():
+
+    def __init__(self, size, k, entries):
+        """
+        `entries[index(board)]` is `move * 3 + value + 1` for the best
+        move and game value of a board, or NO_MOVE.
+        """
+        self.size = size
+        self.k = k
+        self.entries = entries
+
+    @classmethod
+    def build(cls, size=3, k=None):
+        """
+        Solves every position reachable on a `size` x `size` board
+        where `k` in a row wins.
+        """
+        engine = bitboard.Engine(size, k)
+        cells = engine.cells
+        entries = bytearray([NO_MOVE]) * 3 ** cells
+
+        # Cells on the most lines first, and each cell's base-3 digit
+        order = sorted(range(cells),
+                       key=lambda cell: (-engine.priority[cell], cell))
+        powers = [3 ** cell for cell in range(cells)]
+
+        # Scores prefer quicker wins and slower losses, as the search does
+        scores = {}
+
+        def solve(x, o, i):
+            if i in scores:
+                return scores[i]
+            if engine.terminal(x, o):
+                empty = cells - (x | o).bit_count()
+                score = engine.utility(x, o) * (empty + 1)
+            else:
+                taken = x | o
+                moves = [cell for cell in order if not taken >> cell & 1]
+                if engine.player(x, o) == X:
+                    score, move = max(
+                        ((solve(x | 1 << cell, o, i + powers[cell]), cell)
+                         for cell in moves),
+                        key=lambda option: option[0]
+                    )
+                else:
+                    score, move = min(
+                        ((solve(x, o | 1 << cell, i + 2 * powers[cell]), cell)
+                         for cell in moves),
+                        key=lambda option: option[0]
+                    )
+                value = (score > 0) - (score < 0)
+                entries[i] = move * 3 + value + 1
+            scores[i] = score
+            return score
+
+        solve(0, 0, 0)
+        return cls(size, engine.k, entries)
+
+    def lookup(self, board):
+        """
+        Returns the best action and the game value (1 if X wins, -1 if O
+        wins, 0 for a draw) of a board, or None if it is not in the book.
+        """
+        entry = self.entries[index(board)]
+        if entry == NO_MOVE:
+            return None
+        move, value = divmod(entry, 3)
+        return divmod(move, self.size), value - 1
+
+    def save(self, path):
+        """
+        Writes the book to `path`.
+        """
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(BOOK_MAGIC)
+            f.write(struct.pack("<III", BOOK_VERSION, self.size, self.k))
+            f.write(self.entries)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, size, k):
+        """
+        Returns the book stored at `path`, or None if it is missing,
+        from another version or for another board.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        prefix = len(BOOK_MAGIC) + struct.calcsize("<III")
+        if data[:len(BOOK_MAGIC)] != BOOK_MAGIC:
+            return None
+        version, stored_size, stored_k = struct.unpack(
+            "<III", data[len(BOOK_MAGIC):prefix]
+        )
+        if (version, stored_size, stored_k) != (BOOK_VERSION, size, k):
+            return None
+        entries = data[prefix:]
+        if len(entries) != 3 ** (size * size):
+            return None
+        return cls(size, k, entries)
+
+
+def index(board):
+    """
+    Returns the base-3 number of a board, reading cells row by row.
+    """
+    i = 0
+    for row in reversed(board):
+        for cell in reversed(row):
+            i = i * 3 + DIGITS[cell]
+    return i
+
+
+def book_path(size, k):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        f"{size}x{size}-{k}.book")
+
+
+@functools.lru_cache(maxsize=None)
+def load_book(size, k):
+    """
+    Returns the book for a board size and win length, solving and
+    saving it first if it is missing, or None if the board is too big.
+    """
+    path = book_path(size, k)
+    book = Book.load(path, size, k)
+    if book is None and size * size <= MAX_CELLS:
+        book = Book.build(size, k)
+        try:
+            book.save(path)
+        except OSError:
+            pass
+    return book
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python book.py [size] [k]")
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    k = min(int(sys.argv[2]) if len(sys.argv) > 2 else size, size)
+    if size * size > MAX_CELLS:
+        sys.exit(f"Boards over {MAX_CELLS} cells are too big to solve.")
+
+    start = time.perf_counter()
+    book = Book.build(size, k)
+    book.save(book_path(size, k))
+    elapsed = time.perf_counter() - start
+
+    positions = sum(1 for entry in book.entries if entry != NO_MOVE)
+    action, value = book.lookup([[EMPTY] * size for _ in range(size)])
+    outcome = {1: "X wins", -1: "O wins", 0: "draw"}[value]
+    print(f"Solved {positions} positions in {elapsed:.2f}s.")
+    print(f"Perfect play: {outcome}, opening at {action}.")
+
+
+if __name__ == "__main__":
+    main()
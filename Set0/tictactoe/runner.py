@@ -1,9 +1,76 @@
 import pygame
 import sys
+import threading
 import time
+import traceback
 
+import bitboard
+import book
 import tictactoe as ttt
 
+
+class Worker():
+    """
+    Runs the AI's search on a background thread, so the window keeps
+    redrawing while the computer thinks.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.cancelled = None
+        self.move = None
+
+        # Exception raised by the last search, kept until the next one
+        self.error = None
+
+    def start(self, board):
+        """
+        Starts searching for the computer's move on `board`.
+        """
+        self.cancel()
+        self.error = None
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, args=(board, self.cancelled), daemon=True
+        )
+        self.thread.start()
+
+    def run(self, board, cancelled):
+        try:
+            move = ttt.minimax(board, cancelled)
+        except Exception as e:
+            traceback.print_exc()
+            if not cancelled.is_set():
+                self.error = e
+            return
+        if not cancelled.is_set():
+            self.move = move
+
+    def running(self):
+        return self.thread is not None
+
+    def result(self):
+        """
+        Returns the move once the search has finished, else None.
+        """
+        if self.thread is None or self.thread.is_alive():
+            return None
+        move, self.move = self.move, None
+        self.thread = None
+        return move
+
+    def cancel(self):
+        """
+        Stops any search in progress and discards its move.
+        """
+        if self.thread is not None:
+            self.cancelled.set()
+            self.thread.join()
+            self.thread = None
+        self.move = None
+        self.error = None
+
+
 pygame.init()
 size = width, height = 1200, 1000
 
@@ -13,20 +80,53 @@ white = (255, 255, 255)
 
 screen = pygame.display.set_mode(size)
 
+# Optional board size and win length: python runner.py [size] [k]
+# With --table, the AI's transposition table is kept in a file between runs
+args = [arg for arg in sys.argv[1:] if arg != "--table"]
+keep_table = len(args) < len(sys.argv) - 1
+if len(args) > 2:
+    sys.exit("Usage: python runner.py [size] [k] [--table]")
+board_size = int(args[0]) if len(args) > 0 else 3
+if len(args) > 1:
+    ttt.WIN_LENGTH = int(args[1])
+
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+clock = pygame.time.Clock()
+
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = ttt.initial_state(board_size)
+worker = Worker()
+
+# Solve the opening book, if the board is small enough, before play
+# starts: a search cannot be cancelled while it builds the book
+book.load_book(board_size, ttt.win_length(board))
+
+engine = ttt.engine_for(board)
+table_path = bitboard.table_path(board_size, engine.k)
+if keep_table:
+    engine.load_table(table_path)
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            worker.cancel()
+            if keep_table:
+                try:
+                    engine.save_table(table_path)
+                except OSError:
+                    pass
             sys.exit()
 
+        # Escape resets the game at any time, even while the AI thinks
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            worker.cancel()
+            user = None
+            board = ttt.initial_state(board_size)
+
     screen.fill(black)
 
     # Let user choose a player.
@@ -67,13 +167,13 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_size = min(80, 800 // board_size)
+        tile_origin = (width / 2 - (board_size / 2 * tile_size),
+                       height / 2 - (board_size / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(board_size):
             row = []
-            for j in range(3):
+            for j in range(board_size):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -101,29 +201,32 @@ while True:
                 title = f"Game Over: {winner} wins."
         elif user == player:
             title = f"Play as {user}"
+        elif worker.error is not None:
+            title = f"Computer failed: {worker.error}"
         else:
-            title = f"Computer thinking..."
+            dots = int(time.time() * 3) % 4
+            title = "Computer thinking" + "." * dots + " " * (3 - dots)
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
-        if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+        # Check for AI move, searching in the background; a failed
+        # search is not retried until the game is reset
+        if user != player and not game_over and worker.error is None:
+            if not worker.running():
+                worker.start(board)
             else:
-                ai_turn = True
+                move = worker.result()
+                if move is not None:
+                    board = ttt.result(board, move)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(board_size):
+                for j in range(board_size):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -139,8 +242,11 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    worker.cancel()
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = ttt.initial_state(board_size)
 
     pygame.display.flip()
+
+    # Leave the search thread most of the time between frames
+    clock.tick(30)
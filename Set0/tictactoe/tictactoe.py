@@ -5,18 +5,42 @@ Tic Tac Toe Player
 import math
 import copy
 
+import bitboard
+import book
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Number of marks in a row needed to win; None means a full row
+WIN_LENGTH = None
+
+# Seconds the AI may think per move on boards too big to solve outright
+TIME_BUDGET = bitboard.TIME_BUDGET
+
+# Positions searched by the last call to minimax_lists
+lists_nodes = 0
+
 
-def initial_state():
+def initial_state(size=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * size for _ in range(size)]
+
+
+def win_length(board):
+    """
+    Returns how many marks in a row win on the board.
+    """
+    return min(WIN_LENGTH or len(board), len(board))
+
+
+def engine_for(board):
+    """
+    Returns the bitboard engine for the board's size and win length.
+    """
+    return bitboard.engine(len(board), win_length(board))
 
 
 def player(board):
@@ -40,6 +64,19 @@ def actions(board):
 
 
 
+def ordered_actions(board):
+    """
+    Returns the possible actions, cells on the most lines first, so
+    that alpha-beta search finds cutoffs early.
+    """
+    engine = engine_for(board)
+    n = len(board)
+    return sorted(actions(board),
+                  key=lambda action: (-engine.priority[action[0] * n + action[1]],
+                                      action))
+
+
+
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
@@ -65,25 +102,19 @@ def winner(board):
     Returns the winner of the game, if there is one.
     """
     n = len(board)
+    k = win_length(board)
 
+    # Check every run of k cells starting at each cell, going right,
+    # down, and along both diagonals
     for i in range(n):
+        for j in range(n):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                if not (0 <= i + di * (k - 1) < n and 0 <= j + dj * (k - 1) < n):
+                    continue
+                if check_line([board[i + di * step][j + dj * step]
+                               for step in range(k)]):
+                    return board[i][j]
 
-        # Horizontal 
-        if check_line(board[i]):
-            return board[i][0] 
-
-        # Vertical 
-        if check_line([board[j][i] for j in range(n)]):
-            return board[0][i] 
-    
-    # Left to Right    
-    if check_line([board[i][i] for i in range(n)]):
-        return board[0][0]
-
-    # Right to Left
-    if check_line([board[i][n - i - 1] == board[0][n - 1] for i in range(n)]):
-        return board[0][n - 1]
-    
     return None
 
 
@@ -108,10 +139,31 @@ def utility(board):
         
 
 
-def minimax(board):
+def minimax(board, cancelled=None):
     """
     Returns the optimal action for the current player on the board.
+
+    Setting the `cancelled` event, if given, makes a search that is still
+    running return early with the best action found so far.
     """
+    # Boards small enough to solve outright are answered from the book
+    opening_book = book.load_book(len(board), win_length(board))
+    if opening_book is not None:
+        entry = opening_book.lookup(board)
+        if entry is not None:
+            return entry[0]
+
+    engine = engine_for(board)
+    move = engine.minimax(*engine.from_board(board), TIME_BUDGET, cancelled)
+    return None if move is None else engine.to_action(move)
+
+
+def minimax_lists(board):
+    """
+    Returns the optimal action using the list-based search.
+    """
+    global lists_nodes
+    lists_nodes = 0
 
     best_action = None
 
@@ -130,14 +182,16 @@ def minimax(board):
 
 
 def max_value(board, alpha, beta):
-    
+    global lists_nodes
+    lists_nodes += 1
+
     v = -math.inf
     best_action = None
 
     if terminal(board):
         return utility(board), None
 
-    for action in actions(board):
+    for action in ordered_actions(board):
 
         min_val, _ = min_value(result(board, action), alpha, beta)
 
@@ -155,6 +209,8 @@ def max_value(board, alpha, beta):
 
 
 def min_value(board, alpha, beta):
+    global lists_nodes
+    lists_nodes += 1
 
     v = math.inf
 
@@ -163,7 +219,7 @@ def min_value(board, alpha, beta):
     if terminal(board):
         return utility(board), None
 
-    for action in actions(board):
+    for action in ordered_actions(board):
 
         max_val, _ = max_value(result(board, action), alpha, beta)
 
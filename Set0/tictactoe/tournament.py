@@ -0,0 +1,254 @@
+"""
+Headless self-play tournament and benchmark for Tic Tac Toe engines.
+
+Every pair of engines plays a round of games, each engine taking X in
+half of them, spread across a process pool. Reports wins, draws and
+losses, time per move and positions searched per move for each engine.
+
+Usage: python tournament.py [--games N] [--size N] [--k K] [--seconds S]
+                            [--opening PLIES] [--workers N] [--seed N]
+                            [ENGINE ...]
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import time
+
+import bitboard
+import book
+import tictactoe as ttt
+
+DEFAULT_ENGINES = ["book", "ordered", "unordered", "random"]
+
+
+def engine_player(ordering):
+    """
+    Returns a factory for players searching with a fresh bitboard
+    engine each game, so transposition tables start cold.
+    """
+    def factory(size, k, rng):
+        engine = bitboard.Engine(size, k, ordering)
+
+        def play(board):
+            move = engine.minimax(*engine.from_board(board), ttt.TIME_BUDGET)
+            return engine.to_action(move), engine.nodes
+        return play
+    return factory
+
+
+def book_player(size, k, rng):
+    """
+    Plays from the opening book, searching only off the book.
+    """
+    opening_book = book.load_book(size, k)
+    search = engine_player(True)(size, k, rng)
+
+    def play(board):
+        entry = None if opening_book is None else opening_book.lookup(board)
+        if entry is not None:
+            return entry[0], 0
+        return search(board)
+    return play
+
+
+def lists_player(size, k, rng):
+    """
+    Plays with the list-based search.
+    """
+    def play(board):
+        action = ttt.minimax_lists(board)
+        return action, ttt.lists_nodes
+    return play
+
+
+def random_player(size, k, rng):
+    def play(board):
+        return rng.choice(sorted(ttt.actions(board))), None
+    return play
+
+
+ENGINES = {
+    "book": book_player,
+    "ordered": engine_player(True),
+    "unordered": engine_player(False),
+    "lists": lists_player,
+    "random": random_player,
+}
+
+
+def play_game(game):
+    """
+    Plays one game from (X engine, O engine, seed, size, k, opening),
+    making `opening` random moves first.
+
+    Returns the engines, the winner and, for each engine, its number
+    of moves, seconds spent and positions searched.
+    """
+    x_name, o_name, seed, size, k, opening = game
+    rng = random.Random(seed)
+    players = {
+        ttt.X: ENGINES[x_name](size, k, rng),
+        ttt.O: ENGINES[o_name](size, k, rng),
+    }
+    stats = {ttt.X: [0, 0.0, 0], ttt.O: [0, 0.0, 0]}
+
+    board = ttt.initial_state(size)
+    for ply in itertools.count():
+        if ttt.terminal(board):
+            break
+        player = ttt.player(board)
+        if ply < opening:
+            action = rng.choice(sorted(ttt.actions(board)))
+        else:
+            start = time.perf_counter()
+            action, nodes = players[player](board)
+            stats[player][0] += 1
+            stats[player][1] += time.perf_counter() - start
+            if nodes is None or stats[player][2] is None:
+                stats[player][2] = None
+            else:
+                stats[player][2] += nodes
+        board = ttt.result(board, action)
+
+    return x_name, o_name, ttt.winner(board), stats[ttt.X], stats[ttt.O]
+
+
+def init_worker(k, seconds):
+    ttt.WIN_LENGTH = k
+    ttt.TIME_BUDGET = seconds
+
+
+def run_tournament(engines, games, size=3, k=None, seconds=ttt.TIME_BUDGET,
+                   opening=0, workers=None, seed=0):
+    """
+    Plays `games` games between every pair of `engines`, alternating
+    who takes X, across `workers` processes.
+
+    Returns per-engine totals, keyed by engine name, and the results of
+    each pairing, keyed by (X engine, O engine).
+    """
+    k = min(k or size, size)
+
+    # Games read the win length and time budget from the tictactoe module,
+    # so set them for the tournament and put the caller's back afterwards
+    settings = ttt.WIN_LENGTH, ttt.TIME_BUDGET
+    init_worker(k, seconds)
+    try:
+        if "book" in engines:
+            # Solve the book once, before the workers fork
+            book.load_book(size, k)
+
+        schedule = []
+        for first, second in itertools.combinations(engines, 2):
+            for i in range(games):
+                x_name, o_name = (first, second) if i % 2 == 0 else (second, first)
+                schedule.append((x_name, o_name, seed + len(schedule),
+                                 size, k, opening))
+
+        totals = {name: {"games": 0, "wins": 0, "draws": 0, "losses": 0,
+                         "moves": 0, "seconds": 0.0, "nodes": 0}
+                  for name in engines}
+        pairings = {}
+
+        def record(x_name, o_name, winner, x_stats, o_stats):
+            outcome = pairings.setdefault((x_name, o_name), [0, 0, 0])
+            outcome[{ttt.X: 0, None: 1, ttt.O: 2}[winner]] += 1
+            for name, mark, (moves, seconds, nodes) in (
+                    (x_name, ttt.X, x_stats), (o_name, ttt.O, o_stats)):
+                total = totals[name]
+                total["games"] += 1
+                if winner is None:
+                    total["draws"] += 1
+                elif winner == mark:
+                    total["wins"] += 1
+                else:
+                    total["losses"] += 1
+                total["moves"] += moves
+                total["seconds"] += seconds
+                if nodes is None or total["nodes"] is None:
+                    total["nodes"] = None
+                else:
+                    total["nodes"] += nodes
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for game in schedule:
+                record(*play_game(game))
+        else:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "fork" if "fork" in methods else None
+            )
+            with context.Pool(workers, initializer=init_worker,
+                              initargs=(k, seconds)) as pool:
+                for outcome in pool.imap_unordered(play_game, schedule,
+                                                   chunksize=16):
+                    record(*outcome)
+
+        return totals, pairings
+    finally:
+        ttt.WIN_LENGTH, ttt.TIME_BUDGET = settings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play engines against each other without the UI."
+    )
+    parser.add_argument("engines", nargs="*", metavar="ENGINE",
+                        help=f"engines to compare, from "
+                             f"{', '.join(sorted(ENGINES))} (default: "
+                             f"{' '.join(DEFAULT_ENGINES)})")
+    parser.add_argument("--games", type=int, default=100,
+                        help="games per pair of engines (default: 100)")
+    parser.add_argument("--size", type=int, default=3,
+                        help="board size (default: 3)")
+    parser.add_argument("--k", type=int,
+                        help="marks in a row to win (default: size)")
+    parser.add_argument("--seconds", type=float, default=ttt.TIME_BUDGET,
+                        help="time budget per searched move")
+    parser.add_argument("--opening", type=int, default=1,
+                        help="random moves that open each game (default: 1)")
+    parser.add_argument("--workers", type=int,
+                        help="processes to use (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engines = list(dict.fromkeys(args.engines or DEFAULT_ENGINES))
+    for name in engines:
+        if name not in ENGINES:
+            parser.error(f"unknown engine: {name}")
+    if len(engines) < 2:
+        parser.error("at least two different engines are needed")
+
+    start = time.perf_counter()
+    totals, pairings = run_tournament(
+        engines, args.games, args.size, args.k, args.seconds,
+        args.opening, args.workers, args.seed
+    )
+    elapsed = time.perf_counter() - start
+    played = sum(sum(outcome) for outcome in pairings.values())
+    print(f"Played {played} games in {elapsed:.2f}s.")
+    print()
+
+    print(f"{'engine':<10} {'games':>6} {'wins':>6} {'draws':>6} "
+          f"{'losses':>6} {'ms/move':>9} {'nodes/move':>11}")
+    for name in engines:
+        total = totals[name]
+        moves = total["moves"] or 1
+        nodes = ("-" if total["nodes"] is None
+                 else f"{total['nodes'] / moves:.1f}")
+        print(f"{name:<10} {total['games']:>6} {total['wins']:>6} "
+              f"{total['draws']:>6} {total['losses']:>6} "
+              f"{total['seconds'] / moves * 1000:>9.3f} {nodes:>11}")
+    print()
+
+    print(f"{'X':<10} {'O':<10} {'X wins':>7} {'draws':>6} {'O wins':>7}")
+    for (x_name, o_name), (x_wins, draws, o_wins) in sorted(pairings.items()):
+        print(f"{x_name:<10} {o_name:<10} {x_wins:>7} {draws:>6} {o_wins:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Incremental knowledge base for propositional logic.
+"""
+
+from logic import And, Not
+from sat import Encoder
+
+# Models kept to refute queries without searching
+MAX_MODELS = 64
+
+
+class KnowledgeBase():
+    """
+    Set of sentences that answers many queries, sharing work between them.
+
+    Sentences are encoded once into a single SAT solver as they are
+    added, each guarded by a selector variable: its clauses only apply
+    while the selector is assumed true. Retracting a sentence drops its
+    selector, so clauses the solver learned stay sound and keep pruning
+    later searches.
+
+    Answers are cached until the knowledge changes, along with the
+    models found while answering: a query false in any model of the
+    knowledge base is not entailed, with no search at all.
+    """
+
+    def __init__(self, *sentences):
+        self.encoder = Encoder()
+        self.solver = self.encoder.solver
+
+        # Selector variable of each sentence, in the order added
+        self.selectors = {}
+
+        # Entailment of each query asked, and models of the knowledge
+        self.answers = {}
+        self.models = []
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def __len__(self):
+        return len(self.selectors)
+
+    def __iter__(self):
+        return iter(self.selectors)
+
+    def __contains__(self, sentence):
+        return sentence in self.selectors
+
+    def __repr__(self):
+        return f"KnowledgeBase({', '.join(map(str, self.selectors))})"
+
+    def sentence(self):
+        """
+        Returns the conjunction of every sentence in the knowledge base.
+        """
+        return And(*self.selectors)
+
+    def add(self, sentence):
+        """
+        Adds a sentence to the knowledge base.
+        """
+        if sentence in self.selectors:
+            return
+        selector = self.solver.new_variable()
+        for clause in self.encoder.clauses(sentence):
+            self.solver.add_clause([-selector] + clause)
+        self.selectors[sentence] = selector
+
+        # More knowledge keeps every entailment, and the models it allows
+        symbols = sentence.symbols()
+        self.answers = {
+            query: True for query, entailed in self.answers.items() if entailed
+        }
+        self.models = [
+            model for model in self.models
+            if symbols <= model.keys() and sentence.evaluate(model)
+        ]
+
+    def retract(self, sentence):
+        """
+        Removes a sentence from the knowledge base.
+        """
+        try:
+            selector = self.selectors.pop(sentence)
+        except KeyError:
+            raise ValueError(f"{sentence} is not in the knowledge base")
+
+        # Disable the sentence's clauses for good
+        self.solver.add_clause([-selector])
+
+        # Less knowledge keeps every non-entailment and every model
+        self.answers = {
+            query: False
+            for query, entailed in self.answers.items() if not entailed
+        }
+
+    def assumptions(self):
+        return list(self.selectors.values())
+
+    def satisfiable(self):
+        """
+        Returns True if the sentences can all be true at once.
+        """
+        if self.models:
+            return True
+        if self.solver.solve(self.assumptions()):
+            self.models.append(self.encoder.model())
+            return True
+        return False
+
+    def entailed_literals(self, symbols):
+        """
+        Returns every literal about `symbols` that the knowledge base
+        entails. Each model found refutes the opposite of its value for
+        every symbol, so most symbols need at most one search.
+        """
+        literals = []
+        for symbol in symbols:
+            for literal in (symbol, Not(symbol)):
+                if self.entails(literal):
+                    literals.append(literal)
+        return literals
+
+    def entails(self, query):
+        """
+        Checks if the knowledge base entails query.
+        """
+        if query in self.answers:
+            return self.answers[query]
+
+        symbols = query.symbols()
+        if any(symbols <= model.keys() and not query.evaluate(model)
+               for model in self.models):
+            entailed = False
+        else:
+            literal = self.encoder.literal(query)
+            entailed = not self.solver.solve(self.assumptions() + [-literal])
+
+            # The model found is a counterexample to this query, and may
+            # settle later ones
+            if not entailed:
+                self.models.append(self.encoder.model())
+                del self.models[:-MAX_MODELS]
+
+        self.answers[query] = entailed
+        return entailed
@@ -1,7 +1,87 @@
+import functools
 import itertools
+import multiprocessing
+import os
+import warnings
+import weakref
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Models evaluated at once by vectorized model checking, as a power of 2
+VECTOR_BITS = 20
+
+# Blocks of models handed to each process by parallel model checking
+TASKS_PER_WORKER = 4
+
+# Entailment checked by each process of a parallel model check
+worker_check = None
+
+
+def cached(method):
+    """
+    Caches the result of a sentence method without arguments in the
+    slot named after it.
+    """
+    slot = f"_{method.__name__}"
+
+    @functools.wraps(method)
+    def wrapper(self):
+        value = getattr(self, slot)
+        if value is None:
+            value = method(self)
+            object.__setattr__(self, slot, value)
+        return value
+    return wrapper
 
 
 class Sentence():
+    """
+    Immutable, hash-consed logical sentence.
+
+    Constructing a sentence equal to one that already exists returns the
+    existing object, so equal sentences are identical, compare and hash
+    in constant time, and share their cached symbols and formula.
+    """
+
+    __slots__ = ("_arguments", "_hash", "_symbols", "_formula",
+                 "__weakref__")
+
+    # Live sentences by class and constructor arguments
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, arguments, **fields):
+        """
+        Returns the sentence of this class built from `arguments`,
+        creating it with the attributes in `fields` if it is new.
+        """
+        key = (cls, arguments)
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_arguments", arguments)
+            object.__setattr__(sentence, "_hash", hash(key))
+            object.__setattr__(sentence, "_symbols", None)
+            object.__setattr__(sentence, "_formula", None)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return type(self), self._arguments
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -12,8 +92,40 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozen set of all symbols in the logical sentence."""
+        return frozenset()
+
+    def source(self, index):
+        """
+        Returns a Python expression evaluating the sentence for a model
+        `m` given as an integer, with bit `index[name]` set if that
+        symbol is true.
+        """
+        raise Exception("nothing to compile")
+
+    def vectorize(self, columns):
+        """
+        Evaluates the sentence for many models at once, given a NumPy
+        boolean array (or scalar) of each symbol's values by name.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols):
+        """
+        Returns a function evaluating the sentence for a model given as
+        an integer, with bit i set if `symbols[i]` is true.
+        """
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        try:
+            return compile_source(self.source(index))
+        except (SyntaxError, RecursionError, MemoryError):
+
+            # Too deeply nested for the Python compiler
+            def evaluate(m):
+                return self.evaluate({
+                    symbol: bool(m >> i & 1) for symbol, i in index.items()
+                })
+            return evaluate
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +155,10 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls.intern((name,), name=name)
 
     def __repr__(self):
         return self.name
@@ -65,20 +172,29 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
+    @cached
     def symbols(self):
-        return {self.name}
+        return frozenset((self.name,))
 
+    def source(self, index):
+        try:
+            return f"(m >> {index[self.name]} & 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
-class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    def vectorize(self, columns):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+class Not(Sentence):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern((operand,), operand=operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +202,27 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    @cached
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
         return self.operand.symbols()
 
+    def source(self, index):
+        return f"(not {self.operand.source(index)})"
+
+    def vectorize(self, columns):
+        return np.logical_not(self.operand.vectorize(columns))
+
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return cls.intern(conjuncts, conjuncts=conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +231,58 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """
+        Returns the conjunction with `conjunct` added.
+
+        Sentences are immutable, so this no longer changes the conjunction
+        in place: rebind the result, as in `knowledge = knowledge.add(x)`.
+        Deprecated in favour of `And(*knowledge.conjuncts, conjunct)`.
+        """
+        warnings.warn(
+            "And.add returns a new sentence and will be removed; use "
+            "And(*knowledge.conjuncts, conjunct) instead",
+            DeprecationWarning, stacklevel=2
+        )
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    @cached
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
+    @cached
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return frozenset().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        )
+
+    def source(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.source(index) for conjunct in self.conjuncts
+        ) + ")"
+
+    def vectorize(self, columns):
+        return functools.reduce(
+            np.logical_and,
+            (conjunct.vectorize(columns) for conjunct in self.conjuncts),
+            np.bool_(True)
+        )
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return cls.intern(disjuncts, disjuncts=disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +291,42 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    @cached
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
+    @cached
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return frozenset().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        )
+
+    def source(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.source(index) for disjunct in self.disjuncts
+        ) + ")"
+
+    def vectorize(self, columns):
+        return functools.reduce(
+            np.logical_or,
+            (disjunct.vectorize(columns) for disjunct in self.disjuncts),
+            np.bool_(False)
+        )
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return cls.intern((antecedent, consequent),
+                          antecedent=antecedent, consequent=consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +335,33 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    @cached
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
+    @cached
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return self.antecedent.symbols() | self.consequent.symbols()
+
+    def source(self, index):
+        antecedent = self.antecedent.source(index)
+        consequent = self.consequent.source(index)
+        return f"(not {antecedent} or {consequent})"
+
+    def vectorize(self, columns):
+        return np.logical_or(np.logical_not(self.antecedent.vectorize(columns)),
+                             self.consequent.vectorize(columns))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return cls.intern((left, right), left=left, right=right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,17 +372,154 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    @cached
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
+    @cached
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return self.left.symbols() | self.right.symbols()
+
+    def source(self, index):
+        # Leaves are 0 or 1 and `and`/`or` return an operand, so every
+        # subexpression is 0, 1, False or True and compares as a bool
+        return f"({self.left.source(index)} == {self.right.source(index)})"
+
+    def vectorize(self, columns):
+        return np.equal(self.left.vectorize(columns),
+                        self.right.vectorize(columns))
+
 
+@functools.lru_cache(maxsize=1024)
+def compile_source(source):
+    """Returns the compiled function of a model `m` for an expression."""
+    return eval(f"lambda m: {source}")
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+
+def model_check(knowledge, query, vectorized=False, workers=1):
+    """
+    Checks if knowledge base entails query.
+
+    With `vectorized`, evaluates models in blocks as NumPy arrays,
+    which is much faster for more than a dozen symbols. Otherwise,
+    checks models across `workers` processes, or all cores if None.
+    """
+    if vectorized:
+        return model_check_vectorized(knowledge, query)
+    if workers != 1:
+        return model_check_parallel(knowledge, query, workers)
+
+    # Get all symbols in both knowledge and query
+    symbols = sorted(knowledge.symbols() | query.symbols())
+
+    # Compile KB => query, which must hold in every model
+    entailment = Implication(knowledge, query).compile(symbols)
+
+    # Check every model, numbered by the bits of its true symbols
+    return all(map(entailment, range(2 ** len(symbols))))
+
+
+def init_worker(source):
+    global worker_check
+    worker_check = compile_source(source)
+
+
+def check_models(models):
+    """Checks the worker's entailment in every model of a range."""
+    return all(map(worker_check, range(*models)))
+
+
+def model_check_parallel(knowledge, query, workers=None):
+    """
+    Checks if knowledge base entails query across a process pool.
+
+    Models are split on the values of the highest symbols into a few
+    blocks per process. The first block holding a counterexample
+    answers the check and stops every process.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    try:
+        source = Implication(knowledge, query).source(index)
+        compile_source(source)
+    except (SyntaxError, RecursionError, MemoryError):
+        return model_check(knowledge, query)
+
+    workers = workers or os.cpu_count() or 1
+    split = min(len(symbols), (workers * TASKS_PER_WORKER - 1).bit_length())
+    low = len(symbols) - split
+    blocks = [(block << low, (block + 1) << low) for block in range(2 ** split)]
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "fork" if "fork" in methods else None
+    )
+    with context.Pool(workers, initializer=init_worker,
+                      initargs=(source,)) as pool:
+        for holds in pool.imap_unordered(check_models, blocks):
+            if not holds:
+                # Leaving the pool terminates the remaining workers
+                return False
+    return True
+
+
+def entailed_literals(knowledge, symbols):
+    """
+    Returns every literal about `symbols` that knowledge entails: the
+    symbol if it is true in every model of knowledge, and its negation
+    if it is false in every model, in a single pass over the models.
+    """
+    names = sorted(knowledge.symbols() | {symbol.name for symbol in symbols})
+    index = {name: i for i, name in enumerate(names)}
+    satisfies = knowledge.compile(names)
+
+    # Bits of symbols true, and false, in every model seen so far
+    everywhere = (1 << len(names)) - 1
+    always_true = always_false = everywhere
+    for model in filter(satisfies, range(2 ** len(names))):
+        always_true &= model
+        always_false &= everywhere ^ model
+        if not always_true and not always_false:
+            break
+
+    literals = []
+    for symbol in symbols:
+        bit = 1 << index[symbol.name]
+        if always_true & bit:
+            literals.append(symbol)
+        if always_false & bit:
+            literals.append(Not(symbol))
+    return literals
+
+
+def model_check_vectorized(knowledge, query):
+    """Checks if knowledge base entails query, with NumPy truth tables."""
+    if np is None:
+        raise ImportError("vectorized model checking requires numpy")
+
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    entailment = Implication(knowledge, query)
+
+    # The lowest symbols vary within a block of models, as bit columns
+    # of the model numbers; the rest are fixed for the whole block
+    low = min(len(symbols), VECTOR_BITS)
+    models = np.arange(2 ** low, dtype=np.uint32)
+    columns = {
+        symbol: (models >> i & 1).astype(bool)
+        for i, symbol in enumerate(symbols[:low])
+    }
+    for block in range(2 ** (len(symbols) - low)):
+        for i, symbol in enumerate(symbols[low:]):
+            columns[symbol] = np.bool_(block >> i & 1)
+        if not np.all(entailment.vectorize(columns)):
+            return False
+    return True
+
+
+def model_check_recursive(knowledge, query):
+    """Checks if knowledge base entails query, evaluating sentence trees."""
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +550,7 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
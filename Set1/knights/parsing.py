@@ -0,0 +1,243 @@
+"""
+Readers for propositional knowledge bases stored as text.
+
+Sentences use the notation `formula()` emits, one per line:
+
+    (A is a Knight) ∨  (A is a Knave)
+    ¬((A is a Knight) ∧ (A is a Knave))
+    (A is a Knight) => ((A is a Knight) ∧ (A is a Knave))
+
+from tightest to loosest binding ¬, ∧, ∨, => and <=>, the last two
+grouping to the right. Any other run of text is a symbol name.
+
+Clauses use DIMACS CNF, streamed straight into a SAT solver without
+building sentences at all, or read as sentences when needed.
+
+Usage: python parsing.py FILE [QUERY ...]
+"""
+
+import re
+import sys
+import time
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+from knowledge import KnowledgeBase
+from sat import Solver
+
+OPERATORS = re.compile(r"(<=>|=>|[¬∧∨()])")
+
+# Binary operators from loosest to tightest binding, and how they combine
+# their operands
+BINARY = [
+    ("<=>", lambda operands: Biconditional(*operands)),
+    ("=>", lambda operands: Implication(*operands)),
+    ("∨", lambda operands: Or(*operands)),
+    ("∧", lambda operands: And(*operands)),
+]
+
+# Binary operators whose operands group to the right rather than into
+# a single n-ary sentence
+RIGHT = {"<=>", "=>"}
+
+
+class ParseError(ValueError):
+    pass
+
+
+def tokenize(text):
+    """
+    Returns the operators, parentheses and symbol names of a formula.
+    """
+    tokens = []
+    for token in OPERATORS.split(text):
+        token = token.strip()
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def parse(text):
+    """
+    Returns the sentence written in `formula()` notation.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        raise ParseError("empty formula")
+    sentence, position = parse_binary(tokens, 0, 0)
+    if position != len(tokens):
+        raise ParseError(f"unexpected {tokens[position]!r} in {text!r}")
+    return sentence
+
+
+def parse_binary(tokens, position, level):
+    """
+    Parses operands joined by the operator of `level` or tighter ones.
+
+    Returns the sentence and the position of the next token.
+    """
+    if level == len(BINARY):
+        return parse_unary(tokens, position)
+
+    operator, combine = BINARY[level]
+    operand, position = parse_binary(tokens, position, level + 1)
+    operands = [operand]
+    while position < len(tokens) and tokens[position] == operator:
+        operand, position = parse_binary(tokens, position + 1, level + 1)
+        operands.append(operand)
+    if len(operands) == 1:
+        return operands[0], position
+    if operator not in RIGHT:
+        return combine(operands), position
+
+    # Fold a chain like a => b => c from the right, without recursing
+    # once per operator
+    sentence = operands[-1]
+    for operand in reversed(operands[:-1]):
+        sentence = combine([operand, sentence])
+    return sentence, position
+
+
+def parse_unary(tokens, position):
+    """
+    Parses a negation, a parenthesized formula or a symbol.
+    """
+    negations = 0
+    while position < len(tokens) and tokens[position] == "¬":
+        negations += 1
+        position += 1
+    if position == len(tokens):
+        raise ParseError("formula ends early")
+
+    token = tokens[position]
+    if token == "(":
+        sentence, position = parse_binary(tokens, position + 1, 0)
+        if position == len(tokens) or tokens[position] != ")":
+            raise ParseError("missing )")
+        position += 1
+    elif OPERATORS.fullmatch(token):
+        raise ParseError(f"unexpected {token!r}")
+    else:
+        sentence = Symbol(token)
+        position += 1
+
+    for _ in range(negations):
+        sentence = Not(sentence)
+    return sentence, position
+
+
+def read_sentences(lines):
+    """
+    Yields the sentence on each line, skipping blank lines and lines
+    starting with #.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            yield parse(line)
+        except ParseError as e:
+            raise ParseError(f"line {number}: {e}") from None
+
+
+def read_dimacs(lines, sentences=False, header=None):
+    """
+    Yields each clause of a DIMACS CNF file as a list of literals, or
+    as a sentence if `sentences` is true.
+
+    If `header` is a dict, the variable and clause counts declared by
+    the `p cnf` line are stored in it under "variables" and "clauses".
+    """
+    clause = []
+    for number, line in enumerate(lines, 1):
+        if line[:1] == "c":
+            continue
+        if line[:1] == "p":
+            fields = line.split()
+            if (len(fields) != 4 or fields[1] != "cnf"
+                    or not fields[2].isdigit() or not fields[3].isdigit()):
+                raise ParseError(f"line {number}: expected p cnf VARIABLES "
+                                 f"CLAUSES")
+            if header is not None:
+                header["variables"] = int(fields[2])
+                header["clauses"] = int(fields[3])
+            continue
+
+        # Some benchmark files end with "%" and a stray 0
+        if line[:1] == "%":
+            break
+        for literal in map(int, line.split()):
+            if literal:
+                clause.append(literal)
+            else:
+                yield clause_sentence(clause) if sentences else clause
+                clause = []
+    if clause:
+        yield clause_sentence(clause) if sentences else clause
+
+
+def load_dimacs(lines, solver):
+    """
+    Adds every clause of a DIMACS CNF file to a SAT solver, along with
+    every variable the file declares, and returns how many clauses
+    were read.
+    """
+    header = {}
+    add_clause = solver.add_clause
+    count = 0
+    for clause in read_dimacs(lines, header=header):
+        add_clause(clause)
+        count += 1
+
+    # Declared variables may appear in no clause at all
+    solver.reserve(header.get("variables", 0))
+    return count
+
+
+def clause_sentence(clause):
+    """
+    Returns a DIMACS clause as a sentence, naming each variable by its
+    number.
+    """
+    return Or(*[
+        Symbol(str(literal)) if literal > 0 else Not(Symbol(str(-literal)))
+        for literal in clause
+    ])
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python parsing.py FILE [QUERY ...]")
+    filename, queries = sys.argv[1], sys.argv[2:]
+
+    cnf = filename.endswith(".cnf")
+    if cnf and queries:
+        sys.exit("Queries are only supported for formula files.")
+
+    start = time.perf_counter()
+    with open(filename, encoding="utf-8") as f:
+        if cnf:
+            solver = Solver()
+            loaded = f"{load_dimacs(f, solver)} clauses"
+            satisfiable = solver.solve
+        else:
+            kb = KnowledgeBase(*read_sentences(f))
+            solver = kb.solver
+            loaded = f"{len(kb)} sentences"
+            satisfiable = kb.satisfiable
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {loaded} over {solver.num_variables} variables "
+          f"in {elapsed:.2f}s.")
+
+    start = time.perf_counter()
+    answer = "Satisfiable" if satisfiable() else "Unsatisfiable"
+    print(f"{answer} ({time.perf_counter() - start:.2f}s).")
+
+    for query in queries:
+        sentence = parse(query)
+        answer = "entailed" if kb.entails(sentence) else "not entailed"
+        print(f"    {sentence.formula()}: {answer}")
+
+
+if __name__ == "__main__":
+    main()
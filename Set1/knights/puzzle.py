@@ -82,9 +82,10 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
-                    print(f"    {symbol}")
+            # One pass over the models answers every query about the puzzle
+            for literal in entailed_literals(knowledge, symbols):
+                if isinstance(literal, Symbol):
+                    print(f"    {literal}")
 
 
 if __name__ == "__main__":
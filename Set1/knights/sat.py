@@ -0,0 +1,498 @@
+"""
+SAT-based entailment for propositional logic.
+
+Sentences are converted to conjunctive normal form with the Tseitin
+encoding, which names every subformula with a fresh variable so the
+clauses grow linearly with the sentence, and solved by conflict-driven
+clause learning: unit propagation over two watched literals per clause,
+first-UIP learned clauses with backjumping, VSIDS branching and
+restarts.
+
+Literals are nonzero integers as in DIMACS CNF: variable v is true for
+literal v and false for literal -v.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Conflicts before the first restart, and how much that limit grows
+# after each restart
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+# Activity kept by variables at each conflict
+ACTIVITY_DECAY = 0.95
+
+
+class Solver():
+    """
+    Incremental CDCL SAT solver.
+
+    Clauses may be added between calls to `solve`, and clauses learned
+    in one call keep pruning the search in the next.
+    """
+
+    def __init__(self):
+        self.num_variables = 0
+        self.clauses = []
+        self.learned = []
+
+        # Clauses watching each literal, which must be their first or
+        # second literal
+        self.watches = {}
+
+        # Per variable, indexed from 1: value, decision level, the clause
+        # that implied it, branching activity and last value
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+
+        # Assigned literals in order, where each decision level starts,
+        # and the next literal to propagate
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+
+        # Lazy max-heap of (-activity, variable) for branching
+        self.heap = []
+        self.increment = 1.0
+
+        # Set once the clauses are unsatisfiable without any assumptions
+        self.unsatisfiable = False
+
+        # Values of the last satisfying assignment found
+        self.model = None
+
+        # Assumption decided at each of the lowest decision levels, kept
+        # on the trail between calls to `solve`
+        self.assumed = []
+
+        self.conflicts = 0
+        self.decisions = 0
+
+    def new_variable(self):
+        """
+        Returns a new variable.
+        """
+        self.num_variables += 1
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        heapq.heappush(self.heap, (0.0, self.num_variables))
+        return self.num_variables
+
+    def reserve(self, literal):
+        """
+        Creates variables up to the literal's, if they do not exist yet.
+        """
+        while abs(literal) > self.num_variables:
+            self.new_variable()
+
+    def value(self, literal):
+        """
+        Returns True or False if the literal is assigned, else None.
+        """
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, satisfied if any of its literals is true.
+
+        Returns False if the clauses are now known to be unsatisfiable.
+        """
+        self.backtrack(0)
+        literals = set(literals)
+        self.reserve(max(map(abs, literals), default=0))
+
+        # Drop literals false at level 0, and skip clauses already true
+        values = self.values
+        clause = []
+        for literal in literals:
+            if -literal in literals:
+                return True
+            value = values[abs(literal)]
+            if value is None:
+                clause.append(literal)
+            elif value == (literal > 0):
+                return True
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.attach(clause)
+            self.clauses.append(clause)
+        return not self.unsatisfiable
+
+    def attach(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign(self, literal, reason):
+        v = abs(literal)
+        self.values[v] = literal > 0
+        self.levels[v] = len(self.trail_limits)
+        self.reasons[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses.
+
+        Returns a clause with every literal false, or None.
+        """
+        values = self.values
+        watches = self.watches
+        trail = self.trail
+        while self.head < len(trail):
+            false = -trail[self.head]
+            self.head += 1
+            watchers = watches.get(false)
+            if not watchers:
+                continue
+
+            # Keep the clauses that still watch `false` in place
+            i = j = 0
+            n = len(watchers)
+            while i < n:
+                clause = watchers[i]
+                i += 1
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                value = values[abs(first)]
+                if value is not None and value == (first > 0):
+                    watchers[j] = clause
+                    j += 1
+                    continue
+
+                # Watch another literal that is not false, if any
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = values[abs(literal)]
+                    if value is None or value == (literal > 0):
+                        clause[1], clause[k] = literal, false
+                        watches.setdefault(literal, []).append(clause)
+                        break
+                else:
+                    watchers[j] = clause
+                    j += 1
+                    if values[abs(first)] is None:
+                        self.assign(first, clause)
+                        continue
+
+                    # Every literal is false
+                    while i < n:
+                        watchers[j] = watchers[i]
+                        i += 1
+                        j += 1
+                    del watchers[j:]
+                    return clause
+            del watchers[j:]
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, with its
+        asserting literal first, and the level to backjump to.
+        """
+        levels = self.levels
+        level = len(self.trail_limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                v = abs(other)
+                if other == literal or v in seen or levels[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump(v)
+                if levels[v] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the latest seen literal of this level
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learned[0] = -literal
+
+        # Watch the literal of the highest remaining level second
+        if len(learned) == 1:
+            return learned, 0
+        top = max(range(1, len(learned)), key=lambda i: levels[abs(learned[i])])
+        learned[1], learned[top] = learned[top], learned[1]
+        return learned, levels[abs(learned[1])]
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def decay(self):
+        self.increment /= ACTIVITY_DECAY
+        if self.increment > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.num_variables + 1)]
+            heapq.heapify(self.heap)
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment above a decision level.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            v = abs(literal)
+            self.phases[v] = self.values[v]
+            self.values[v] = None
+            self.reasons[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.head = limit
+
+    def pick(self):
+        """
+        Returns the unassigned variable of highest activity, or None.
+        """
+        while self.heap:
+            activity, v = heapq.heappop(self.heap)
+            if self.values[v] is None and -activity == self.activity[v]:
+                return v
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses can all be satisfied with every
+        literal in `assumptions` true, recording the assignment in
+        `model`, else False.
+        """
+        if self.unsatisfiable:
+            return False
+        for literal in assumptions:
+            self.reserve(literal)
+
+        # Keep the propagated levels of assumptions shared with the last
+        # call, so repeated queries under the same assumptions skip them
+        kept = 0
+        while (kept < len(self.trail_limits) and kept < len(self.assumed)
+               and kept < len(assumptions)
+               and self.assumed[kept] == assumptions[kept]):
+            kept += 1
+        self.backtrack(kept)
+        self.assumed = list(assumptions)
+
+        restart_limit = RESTART_FIRST
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.unsatisfiable = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.attach(learned)
+                    self.learned.append(learned)
+                    self.assign(learned[0], learned)
+                self.decay()
+                continue
+
+            if conflicts >= restart_limit:
+                conflicts = 0
+                restart_limit *= RESTART_GROWTH
+                self.backtrack(len(assumptions))
+                continue
+
+            # Each assumption gets a decision level of its own
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value is False:
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            v = self.pick()
+            if v is None:
+                self.model = self.values[:]
+                self.backtrack(len(assumptions))
+                return True
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            self.assign(v if self.phases[v] else -v, None)
+
+
+class Encoder():
+    """
+    Adds sentences to a solver with the Tseitin encoding.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = solver or Solver()
+
+        # Variable of each symbol, by name
+        self.variables = {}
+
+        # Literal equivalent to each encoded sentence, by id, kept with
+        # the sentence so that the id stays in use
+        self.literals = {}
+
+        self.true = None
+
+    def variable(self, name):
+        """
+        Returns the variable of a symbol, creating it if needed.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def constant(self, value):
+        """
+        Returns a literal that is always `value`.
+        """
+        if self.true is None:
+            self.true = self.solver.new_variable()
+            self.solver.add_clause([self.true])
+        return self.true if value else -self.true
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to the sentence, adding clauses
+        that define any new variables it needs.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        cached = self.literals.get(id(sentence))
+        if cached is not None:
+            return cached[1]
+
+        add_clause = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            conjunction = isinstance(sentence, And)
+            operands = sentence.conjuncts if conjunction else sentence.disjuncts
+            literals = [self.literal(operand) for operand in operands]
+            if not literals:
+                return self.constant(conjunction)
+            if len(literals) == 1:
+                return literals[0]
+
+            # For And, v implies every operand and all of them imply v;
+            # Or is the same with every literal negated
+            sign = 1 if conjunction else -1
+            literal = self.solver.new_variable()
+            for operand in literals:
+                add_clause([-sign * literal, sign * operand])
+            add_clause([sign * literal]
+                       + [-sign * operand for operand in literals])
+
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            literal = self.solver.new_variable()
+            add_clause([literal, a])
+            add_clause([literal, -b])
+            add_clause([-literal, -a, b])
+
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            literal = self.solver.new_variable()
+            add_clause([-literal, -a, b])
+            add_clause([-literal, a, -b])
+            add_clause([literal, a, b])
+            add_clause([literal, -a, -b])
+
+        else:
+            raise Exception(f"cannot encode {sentence!r}")
+
+        self.literals[id(sentence)] = (sentence, literal)
+        return literal
+
+    def clauses(self, sentence):
+        """
+        Returns the clauses asserting a sentence, naming only the
+        subformulas that do not fit in a clause directly.
+        """
+        if isinstance(sentence, And):
+            return [clause for conjunct in sentence.conjuncts
+                    for clause in self.clauses(conjunct)]
+        if isinstance(sentence, Or):
+            return [[self.literal(disjunct) for disjunct in sentence.disjuncts]]
+        if isinstance(sentence, Implication):
+            return [[-self.literal(sentence.antecedent),
+                     self.literal(sentence.consequent)]]
+        return [[self.literal(sentence)]]
+
+    def add(self, sentence):
+        """
+        Asserts a sentence. Returns False if the solver's clauses are
+        now known to be unsatisfiable.
+        """
+        for clause in self.clauses(sentence):
+            self.solver.add_clause(clause)
+        return not self.solver.unsatisfiable
+
+    def model(self):
+        """
+        Returns the solver's last model as a dict of symbol values.
+        """
+        model = self.solver.model
+        return {name: bool(model[v]) for name, v in self.variables.items()}
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that knowledge
+    and the negation of the query cannot both be true.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    return not encoder.solver.solve([-encoder.literal(query)])
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of the sentence's symbols in which it is true,
+    or None if there is none.
+    """
+    encoder = Encoder()
+    if encoder.add(sentence) and encoder.solver.solve():
+        return encoder.model()
+    return None
@@ -0,0 +1,112 @@
+import itertools
+import random
+
+import sat
+from logic import (And, Biconditional, Implication, Not, Or, Symbol,
+                   model_check_recursive)
+
+rng = random.Random(0)
+
+
+def random_clauses(n, m):
+    return [[rng.choice([1, -1]) * rng.randrange(1, n + 1)
+             for _ in range(rng.randrange(1, 4))] for _ in range(m)]
+
+
+def brute_force(n, clauses):
+    """Returns True if some assignment of `n` variables satisfies every clause."""
+    for bits in itertools.product([False, True], repeat=n):
+        if all(any((literal > 0) == bits[abs(literal) - 1] for literal in clause)
+               for clause in clauses):
+            return True
+    return False
+
+
+def random_sentence(symbols, depth):
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(symbols)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(symbols, depth - 1))
+    if kind == 1:
+        return And(*[random_sentence(symbols, depth - 1)
+                     for _ in range(rng.randrange(1, 4))])
+    if kind == 2:
+        return Or(*[random_sentence(symbols, depth - 1)
+                    for _ in range(rng.randrange(1, 4))])
+    if kind == 3:
+        return Implication(random_sentence(symbols, depth - 1),
+                           random_sentence(symbols, depth - 1))
+    return Biconditional(random_sentence(symbols, depth - 1),
+                         random_sentence(symbols, depth - 1))
+
+
+# Solver.solve against truth tables, with and without assumptions
+for trial in range(1000):
+    n = rng.randrange(1, 9)
+    clauses = random_clauses(n, rng.randrange(1, 40))
+    solver = sat.Solver()
+    solver.reserve(n)
+    for clause in clauses:
+        solver.add_clause(clause)
+
+    expected = brute_force(n, clauses)
+    assert solver.solve() == expected, clauses
+    if expected:
+        assert all(any(bool(solver.model[abs(literal)]) == (literal > 0)
+                       for literal in clause) for clause in clauses)
+
+    assumptions = [rng.choice([1, -1]) * rng.randrange(1, n + 1)
+                   for _ in range(2)]
+    assert solver.solve(assumptions) == brute_force(
+        n, clauses + [[literal] for literal in assumptions]
+    ), (clauses, assumptions)
+    assert solver.solve() == expected, clauses
+
+# Repeated calls sharing assumption prefixes reuse their levels, and must
+# still agree with truth tables as clauses are added between calls
+for trial in range(200):
+    n = rng.randrange(2, 9)
+    clauses = random_clauses(n, rng.randrange(1, 20))
+    solver = sat.Solver()
+    solver.reserve(n)
+    for clause in clauses:
+        solver.add_clause(clause)
+
+    assumptions = []
+    for step in range(15):
+        action = rng.randrange(5)
+        if action == 0 and assumptions:
+            assumptions.pop()
+        elif action == 1 and assumptions:
+            assumptions[-1] = -assumptions[-1]
+        elif action == 2:
+            clause = random_clauses(n, 1)[0]
+            clauses.append(clause)
+            solver.add_clause(clause)
+        elif len(assumptions) < n:
+            assumptions.append(rng.choice([1, -1]) * rng.randrange(1, n + 1))
+        expected = brute_force(
+            n, clauses + [[literal] for literal in assumptions]
+        )
+        assert solver.solve(assumptions) == expected, (clauses, assumptions)
+        if expected:
+            assert all(bool(solver.model[abs(literal)]) == (literal > 0)
+                       for literal in assumptions)
+
+# sat.entails and sat.satisfiable against model checking
+symbols = [Symbol(name) for name in "ABCDE"]
+for trial in range(1000):
+    knowledge = random_sentence(symbols, 4)
+    query = random_sentence(symbols, 3)
+    assert sat.entails(knowledge, query) == \
+        model_check_recursive(knowledge, query), (knowledge, query)
+
+    model = sat.satisfiable(knowledge)
+    contradiction = And(symbols[0], Not(symbols[0]))
+    assert (model is None) == model_check_recursive(knowledge, contradiction)
+    if model is not None:
+        full = {symbol.name: model.get(symbol.name, False) for symbol in symbols}
+        assert knowledge.evaluate(full), knowledge
+
+print("All tests passed.")